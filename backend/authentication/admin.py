@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User
+from .models import User, EmailOutbox
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -7,3 +7,11 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('email', 'username')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'last_login')
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipient', 'subject')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
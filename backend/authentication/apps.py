@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+
+        if settings.LAST_LOGIN_BATCHING:
+            from django.contrib.auth.signals import user_logged_in
+            from .last_login import buffered_update_last_login
+
+            # Replace the per-login UPDATE connected by django.contrib.auth
+            user_logged_in.disconnect(dispatch_uid='update_last_login')
+            user_logged_in.connect(buffered_update_last_login, dispatch_uid='buffered_update_last_login')
+
+        if settings.SWEEP_INTERVAL:
+            from . import sweeper  # noqa: F401  starts the periodic sweep on the first request
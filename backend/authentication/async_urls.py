@@ -0,0 +1,12 @@
+from django.urls import path
+from . import async_views
+
+# Routes served by async views when ASYNC_VIEWS is enabled; they shadow the
+# synchronous views of the same name in urls.py
+urlpatterns = [
+    path('register/', async_views.register, name='register'),
+    path('login/', async_views.login_view, name='login'),
+    path('profile/', async_views.user_profile, name='user_profile'),
+    path('forgot-password/', async_views.forgot_password, name='forgot_password'),
+    path('health/', async_views.health_check, name='health_check'),
+]
@@ -0,0 +1,225 @@
+"""
+Async versions of the hot authentication views, served when ASYNC_VIEWS is
+enabled (the default under backend/asgi.py).
+
+They mirror the DRF views in views.py request for request, but wait on the
+database with Django's async ORM and on password hashing with the hashing
+pool's async API, so a worker keeps serving other connections meanwhile.
+DRF 3.14 has no async views, so these are plain Django views rendering
+their payloads with the same renderer as the DRF views.
+"""
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user, login
+from django.db import IntegrityError
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import serializers
+
+from . import events, hashing, mail, outbox, tokens
+from .authentication import InvalidBearerToken, TokenUser
+from .models import AuthEvent, User, PasswordResetToken
+from .profile_cache import profile_cache
+from .renderers import FastJSONRenderer
+from .serializers import UserLoginSerializer, UserRegistrationSerializer, serialize_user, unique_violations
+
+_renderer = FastJSONRenderer()
+
+
+def _response(data, status=200, headers=None):
+    # Same bytes as the DRF views' renderer
+    return HttpResponse(
+        _renderer.render(data), status=status, headers=headers, content_type='application/json',
+    )
+
+
+def async_api_view(methods):
+    """
+    Async counterpart of @api_view: restricts methods, parses JSON bodies
+    into request.data, turns hashing backpressure into 503 responses and
+    bad bearer tokens into 401.
+    Like DRF's views these are exempt from Django's CSRF middleware.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return _response(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status=405,
+                    headers={'Allow': ', '.join(methods)},
+                )
+            request.data = {}
+            if request.body:
+                try:
+                    request.data = json.loads(request.body)
+                except ValueError as e:
+                    return _response({'detail': f'JSON parse error - {e}'}, status=400)
+            try:
+                return await view(request, *args, **kwargs)
+            except hashing.HashingUnavailable as e:
+                return _response(
+                    {'detail': str(e.detail)}, status=e.status_code,
+                    headers={'Retry-After': str(e.wait)},
+                )
+            except InvalidBearerToken as e:
+                return _response(
+                    {'detail': str(e.detail)}, status=e.status_code,
+                    headers={'WWW-Authenticate': e.auth_header},
+                )
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def _authenticate(request):
+    """
+    request.user without blocking the event loop: bearer token first, then
+    session. A bad bearer token raises InvalidBearerToken, as in the DRF views.
+    """
+    header = request.headers.get('Authorization', '').split()
+    if settings.AUTH_TOKENS_ENABLED and header and header[0].lower() == 'bearer':
+        if len(header) != 2:
+            raise InvalidBearerToken('Invalid bearer token header.')
+        try:
+            return TokenUser(tokens.decode(header[1], tokens.ACCESS))
+        except tokens.TokenError as e:
+            raise InvalidBearerToken(str(e))
+    if not hasattr(request, 'session'):
+        # PathScopedMiddleware skipped the session for a request without a cookie
+        return None
+    user = await sync_to_async(get_user)(request)
+    return user if user.is_authenticated else None
+
+
+@async_api_view(['POST'])
+async def register(request):
+    serializer = UserRegistrationSerializer(data=request.data)
+    # Field and uniqueness validation query the database synchronously
+    if not await sync_to_async(serializer.is_valid)():
+        return _response(serializer.errors, status=400)
+
+    data = serializer.validated_data
+    user = User(
+        email=User.objects.normalize_email(data['email']),
+        username=data['username'],
+    )
+    user.password = await hashing.amake_password(data['password'])
+    try:
+        await user.asave(force_insert=True)
+    except IntegrityError:
+        # Taken by a user the existence index had not seen yet
+        errors = await sync_to_async(unique_violations)(data)
+        if not errors:
+            raise
+        return _response(errors, status=400)
+    await events.arecord(AuthEvent.REGISTER, request, user)
+    return _response({
+        'message': 'Registration successful',
+        'user': serialize_user(user)
+    }, status=201)
+
+
+@async_api_view(['POST'])
+async def login_view(request):
+    serializer = UserLoginSerializer(data=request.data)
+    try:
+        # Field validation only; credentials are checked below without
+        # going through the synchronous authenticate()
+        attrs = serializer.to_internal_value(request.data)
+    except serializers.ValidationError as e:
+        email = request.data.get('email', '') if isinstance(request.data, dict) else ''
+        await events.arecord(AuthEvent.LOGIN_FAILED, request, email=email)
+        return _response(e.detail, status=400)
+
+    user = await User.objects.filter(email=attrs['email']).afirst()
+    if user is None:
+        # Run the hasher anyway so unknown emails take as long as wrong passwords
+        await hashing.amake_password(attrs['password'])
+        is_correct = False
+    else:
+        is_correct, must_update = await hashing.acheck_password(attrs['password'], user.password)
+        if is_correct and must_update:
+            user.password = await hashing.amake_password(attrs['password'])
+            await user.asave(update_fields=['password'])
+
+    if not is_correct or not user.is_active:
+        await events.arecord(AuthEvent.LOGIN_FAILED, request, email=attrs['email'])
+        if not is_correct:
+            return _response({'non_field_errors': ['Invalid email or password']}, status=400)
+        return _response({'non_field_errors': ['User account is disabled']}, status=400)
+
+    await sync_to_async(login)(request, user)
+    await events.arecord(AuthEvent.LOGIN, request, user)
+    data = {
+        'message': 'Login successful',
+        'user': serialize_user(user)
+    }
+    if settings.AUTH_TOKENS_ENABLED:
+        data['tokens'] = tokens.issue_pair(user)
+    return _response(data, status=200)
+
+
+async def _cache_call(fn, *args):
+    # A shared cache backend does network I/O; the in-process LRU does not
+    if profile_cache.shared is None:
+        return fn(*args)
+    return await sync_to_async(fn)(*args)
+
+
+@async_api_view(['GET'])
+async def user_profile(request):
+    user = await _authenticate(request)
+    if user is None:
+        return _response({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    version = await _cache_call(profile_cache.version, user.pk)
+    etag = profile_cache.etag(user.pk, version)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    cached = await _cache_call(profile_cache.get, user.pk, version)
+    if cached is not None:
+        etag, data = cached
+    else:
+        if isinstance(user, TokenUser):
+            user = await User.objects.aget(pk=user.pk)
+        data = serialize_user(user)
+        etag = await _cache_call(profile_cache.set, user.pk, data, version)
+    response = _response(data, status=200)
+    response['ETag'] = etag
+    return response
+
+
+@async_api_view(['POST'])
+async def forgot_password(request):
+    email = request.data.get('email')
+    if not email:
+        return _response({
+            'error': 'Email is required'
+        }, status=400)
+
+    user = await User.objects.filter(email=email).afirst()
+    if user is None:
+        await events.arecord(AuthEvent.RESET_REQUEST, request, email=email)
+        # For security, don't reveal if email exists or not
+        return _response({
+            'message': f'If an account with email {email} exists, a password reset link has been sent.'
+        }, status=200)
+
+    reset_token = await PasswordResetToken.objects.aissue(user)
+    message = mail.password_reset(user, reset_token, mail.select_locale(request.headers.get('Accept-Language')))
+    await outbox.aenqueue(subject=message.subject, body=message.text, html_body=message.html, recipient=email)
+    await events.arecord(AuthEvent.RESET_REQUEST, request, user)
+
+    return _response({
+        'message': f'Password reset email sent to {email}'
+    }, status=200)
+
+
+@async_api_view(['GET'])
+async def health_check(request):
+    return _response({'status': 'healthy'}, status=200)
@@ -0,0 +1,68 @@
+from rest_framework import authentication, exceptions
+
+from . import tokens
+
+
+class TokenUser:
+    """
+    Authenticated user built from access token claims, without a database
+    query. Views that need the model instance call get_user().
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, claims):
+        self.id = self.pk = claims['sub']
+        self.username = claims['username']
+        self.email = claims['email']
+        self.created_at = claims['created_at']
+        self._user = None
+
+    def __str__(self):
+        return self.email
+
+    def get_user(self):
+        if self._user is None:
+            from .models import User
+            self._user = User.objects.get(pk=self.pk)
+        return self._user
+
+
+class InvalidBearerToken(exceptions.APIException):
+    """
+    401 with a Bearer challenge for a bad or expired access token. DRF would
+    turn AuthenticationFailed into 403 because SessionAuthentication comes
+    first and sends no challenge; the async views answer the same way.
+    """
+    status_code = 401
+    default_detail = 'Invalid bearer token.'
+    default_code = 'authentication_failed'
+    auth_header = 'Bearer'
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Accepts "Authorization: Bearer <access token>" issued by login_view.
+
+    Runs alongside SessionAuthentication; requests without a bearer token are
+    left to the other authentication classes.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise InvalidBearerToken('Invalid bearer token header.')
+        try:
+            claims = tokens.decode(header[1].decode('ascii'), tokens.ACCESS)
+        except UnicodeDecodeError:
+            raise InvalidBearerToken('Malformed token')
+        except tokens.TokenError as e:
+            raise InvalidBearerToken(str(e))
+        return TokenUser(claims), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,74 @@
+"""
+In-process periodic work.
+
+PeriodicTask runs a function on a daemon thread every `interval` seconds, or
+sooner when trigger() is called, and by default once more when the process
+exits so buffered work is not lost on a clean shutdown. The thread starts
+lazily on the first ensure_started() call, which keeps management commands
+and migrations free of background threads, and is restarted in forked
+children.
+"""
+import atexit
+import logging
+import threading
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name, interval, fn, run_at_exit=True):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.run_at_exit = run_at_exit
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def trigger(self):
+        """Run the task now instead of waiting for the interval"""
+        self._wake.set()
+
+    def run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            logger.exception('Periodic task %s failed', self.name)
+        finally:
+            # Don't hold a database connection between runs
+            connection.close()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            self.run_once()
+
+    def stop(self, timeout=10):
+        """Stop the thread, then run the task one last time if run_at_exit"""
+        thread = self._thread
+        self._stopping.set()
+        self._wake.set()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+            if self.run_at_exit:
+                self.run_once()
@@ -0,0 +1,205 @@
+"""
+Buffered authentication event log.
+
+Views call record() for logins, failed logins, registrations, password
+changes and reset requests (async views await arecord()). record() only
+appends a tuple to an in-memory ring buffer; a PeriodicTask drains it every
+FLUSH_INTERVAL seconds, as soon as FLUSH_SIZE events are waiting, and when
+the process exits, writing either AuthEvent rows with bulk_create (SINK
+"database") or gzip-compressed JSONL files rotated per hour (SINK "file",
+one file per process and hour in DIR).
+
+When the buffer holds CAPACITY events, OVERFLOW decides what gives:
+"drop_oldest" overwrites the oldest event, "drop_newest" discards the new
+one, and "block" makes the request wait up to BLOCK_TIMEOUT seconds for a
+flush to make room before dropping it. Dropped events are counted in
+auth_events_dropped_total. Like last_login, events buffered by a process
+that is killed outright are lost.
+"""
+import gzip
+import ipaddress
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics, throttling
+from .background import PeriodicTask
+
+recorded = metrics.counter('auth_events_recorded_total', 'Authentication events recorded', labelnames=('kind',))
+dropped = metrics.counter(
+    'auth_events_dropped_total', 'Authentication events lost to a full buffer or a failed write',
+    labelnames=('reason',),
+)
+flushed = metrics.counter('auth_events_flushed_total', 'Authentication events written out')
+flush_seconds = metrics.histogram('auth_events_flush_seconds', 'Time spent writing one event batch')
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class DatabaseSink:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def write(self, events):
+        from .models import AuthEvent
+
+        AuthEvent.objects.bulk_create(
+            [
+                AuthEvent(kind=kind, user_id=user_id, email=email, ip=ip, created_at=created_at)
+                for kind, user_id, email, ip, created_at in events
+            ],
+            batch_size=self.batch_size,
+        )
+
+
+class FileSink:
+    """Appends gzip members to DIR/auth-events-<YYYYmmddHH>-<pid>.jsonl.gz"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, when):
+        return os.path.join(self.directory, f'auth-events-{when:%Y%m%d%H}-{os.getpid()}.jsonl.gz')
+
+    def write(self, events):
+        os.makedirs(self.directory, exist_ok=True)
+        by_path = {}
+        for kind, user_id, email, ip, created_at in events:
+            line = json.dumps({
+                'kind': kind, 'user_id': user_id, 'email': email, 'ip': ip,
+                'created_at': created_at.isoformat(),
+            }, separators=(',', ':'))
+            by_path.setdefault(self.path(created_at), []).append(line)
+        for path, lines in by_path.items():
+            # Each flush appends one gzip member; gzip readers concatenate them
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+
+class EventLog:
+    def __init__(self, sink, capacity, overflow, flush_interval, flush_size, block_timeout=0.05):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'AUTH_EVENTS OVERFLOW must be one of {", ".join(OVERFLOW_POLICIES)}')
+        self.sink = sink
+        self.capacity = capacity
+        self.overflow = overflow
+        self.flush_size = min(flush_size, capacity)
+        self.block_timeout = block_timeout
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)
+        self.task = PeriodicTask('auth-events-flush', flush_interval, self.flush)
+
+    def append(self, event):
+        with self._lock:
+            if len(self._events) >= self.capacity:
+                if not self._make_room():
+                    dropped.labels('buffer_full').inc()
+                    return False
+            self._events.append(event)
+            size = len(self._events)
+        self.task.ensure_started()
+        if size >= self.flush_size:
+            self.task.trigger()
+        return True
+
+    def _make_room(self):
+        """Called with the lock held and the buffer full; True if event may be appended"""
+        if self.overflow == 'drop_oldest':
+            self._events.popleft()
+            dropped.labels('overwritten').inc()
+            return True
+        if self.overflow == 'block':
+            self.task.ensure_started()
+            self.task.trigger()
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._events) >= self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._room.wait(remaining):
+                    return False
+            return True
+        return False
+
+    def flush(self):
+        """Write every buffered event; returns how many were written"""
+        with self._lock:
+            events, self._events = self._events, deque()
+            self._room.notify_all()
+        if not events:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            self.sink.write(events)
+        except Exception:
+            # Put the batch back in front of newer events, keeping the newest if it no longer fits
+            with self._lock:
+                events.extend(self._events)
+                while len(events) > self.capacity:
+                    events.popleft()
+                    dropped.labels('write_failed').inc()
+                self._events = events
+            raise
+        flush_seconds.observe(time.perf_counter() - started)
+        flushed.inc(len(events))
+        return len(events)
+
+    def __len__(self):
+        return len(self._events)
+
+
+def _build_log():
+    config = settings.AUTH_EVENTS
+    if config.get('SINK', 'database') == 'file':
+        sink = FileSink(config['DIR'])
+    else:
+        sink = DatabaseSink(config.get('BATCH_SIZE', 500))
+    return EventLog(
+        sink,
+        capacity=config.get('CAPACITY', 10000),
+        overflow=config.get('OVERFLOW', 'drop_oldest'),
+        flush_interval=config.get('FLUSH_INTERVAL', 2),
+        flush_size=config.get('FLUSH_SIZE', 1000),
+        block_timeout=config.get('BLOCK_TIMEOUT', 0.05),
+    )
+
+
+log = _build_log()
+_enabled = settings.AUTH_EVENTS.get('ENABLED', True)
+_ip_header = settings.AUTH_EVENTS.get('IP_HEADER')
+
+
+def _valid_ip(value):
+    # IP_HEADER values are client supplied; one bad address must not fail a whole batch
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+def record(kind, request=None, user=None, email=''):
+    """Buffer one event; user and request are optional"""
+    if not _enabled:
+        return
+    if user is not None and getattr(user, 'pk', None) is not None:
+        user_id, email = user.pk, email or getattr(user, 'email', '')
+    else:
+        user_id = None
+    email = email[:150] if isinstance(email, str) else ''
+    ip = _valid_ip(throttling.client_ip(request, _ip_header)) if request is not None else None
+    if log.append((kind, user_id, email, ip, timezone.now())):
+        recorded.labels(kind).inc()
+
+
+async def arecord(kind, request=None, user=None, email=''):
+    """record() for async views; with OVERFLOW "block" the wait happens off the event loop"""
+    if log.overflow == 'block':
+        await sync_to_async(record, thread_sensitive=False)(kind, request, user, email)
+    else:
+        record(kind, request, user, email)
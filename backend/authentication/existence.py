@@ -0,0 +1,197 @@
+"""
+In-memory existence index for usernames and emails.
+
+Registration has to prove that the username and the email are unused, and
+the signup form wants to check a username as it is typed. Almost every
+name asked about is free, so each process keeps one Bloom filter per field
+holding every username and email in the user table. A miss in the filter
+means "definitely free" and needs no query. A hit may be a false positive
+(ERROR_RATE, about 0.1% by default), so it is confirmed with the usual
+indexed lookup.
+
+The filters are built by a PeriodicTask that starts on the first request
+the process serves. It first scans the table in primary-key batches, then
+every REFRESH_INTERVAL seconds it reads only rows with a higher id than it
+has seen. Users saved in this process are added at once through post_save.
+Until the first scan finishes every lookup falls back to the database.
+
+Keys are normalised more loosely than MySQL compares them (case folded,
+accents and trailing spaces stripped), so a filter miss can never hide a
+row the unique index would match. Two things can still let a taken name
+through: a rename in another process is only seen after a rebuild, and a
+user created elsewhere is only seen after the next refresh. Those cases
+reach the INSERT and fail on the unique constraint, and registration turns
+that IntegrityError back into the usual validation error. Filters are
+rebuilt from scratch when they hold more entries than they were sized for.
+"""
+import hashlib
+import math
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.core.signals import request_started
+
+from . import metrics
+from .background import PeriodicTask
+
+FIELDS = ('username', 'email')
+
+lookups = metrics.counter(
+    'auth_existence_lookups_total', 'Existence checks by field and outcome '
+    '(free: answered from memory; taken / false_positive: confirmed with a query; cold: index not ready)',
+    labelnames=('field', 'result'),
+)
+queries_saved = metrics.counter(
+    'auth_existence_queries_saved_total', 'Uniqueness queries answered from the existence index',
+    labelnames=('field',),
+)
+
+
+def normalize(value):
+    # At least as loose as MySQL's case and accent insensitive, PAD SPACE collations
+    folded = unicodedata.normalize('NFKD', value.casefold().rstrip(' '))
+    return ''.join(char for char in folded if not unicodedata.combining(char))
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class ExistenceIndex:
+    def __init__(self, capacity, error_rate, refresh_interval, batch_size=10000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.batch_size = batch_size
+        self.filters = None
+        self.last_id = 0
+        self._started = False
+        self._lock = threading.Lock()
+        self.task = PeriodicTask('existence-index-refresh', refresh_interval, self.refresh, run_at_exit=False)
+
+    @property
+    def ready(self):
+        return self.filters is not None
+
+    def start(self):
+        """Start the background build; the first scan runs right away"""
+        if not self._started:
+            self._started = True
+            self.task.ensure_started()
+            self.task.trigger()
+
+    def _new_filters(self, capacity):
+        return {field: BloomFilter(capacity, self.error_rate) for field in FIELDS}
+
+    def _scan(self, filters, after):
+        """Add users with id > after to filters; returns the highest id seen"""
+        from .models import User
+
+        while True:
+            rows = list(
+                User.objects.filter(id__gt=after).order_by('id')
+                .values_list('id', *FIELDS)[:self.batch_size]
+            )
+            keys = [(field, normalize(value)) for row in rows for field, value in zip(FIELDS, row[1:])]
+            # Setting bits is read-modify-write; concurrent add() calls must not interleave
+            with self._lock:
+                for field, key in keys:
+                    filters[field].add(key)
+            if len(rows) < self.batch_size:
+                return rows[-1][0] if rows else after
+            after = rows[-1][0]
+
+    def refresh(self):
+        """Build the filters, or add users created since the last scan"""
+        filters = self.filters
+        if filters is None or filters['username'].count > filters['username'].capacity:
+            from .models import User
+
+            capacity = max(self.capacity, User.objects.count() * 2)
+            filters = self._new_filters(capacity)
+            last_id = self._scan(filters, 0)
+            with self._lock:
+                self.filters, self.last_id = filters, max(last_id, self.last_id)
+            return
+        last_id = self._scan(filters, self.last_id)
+        with self._lock:
+            self.last_id = max(last_id, self.last_id)
+
+    def add(self, user):
+        filters = self.filters
+        if filters is None:
+            return
+        with self._lock:
+            for field in FIELDS:
+                filters[field].add(normalize(getattr(user, field)))
+
+    def might_exist(self, field, value):
+        """False only if no user has this value; True means "ask the database" """
+        filters = self.filters
+        if filters is None:
+            self.start()
+            lookups.labels(field, 'cold').inc()
+            return True
+        if normalize(value) in filters[field]:
+            return True
+        lookups.labels(field, 'free').inc()
+        queries_saved.labels(field).inc()
+        return False
+
+    def exists(self, field, value):
+        """Whether a user has this username/email, querying only on a filter hit"""
+        from .models import User
+
+        if not self.might_exist(field, value):
+            return False
+        taken = User.objects.filter(**{field: value}).exists()
+        if self.ready:
+            lookups.labels(field, 'taken' if taken else 'false_positive').inc()
+        return taken
+
+
+_config = settings.EXISTENCE_INDEX
+enabled = _config.get('ENABLED', True)
+index = ExistenceIndex(
+    capacity=_config.get('CAPACITY', 1000000),
+    error_rate=_config.get('ERROR_RATE', 0.001),
+    refresh_interval=_config.get('REFRESH_INTERVAL', 30),
+    batch_size=_config.get('BATCH_SIZE', 10000),
+)
+
+
+def exists(field, value):
+    if not enabled:
+        from .models import User
+
+        return User.objects.filter(**{field: value}).exists()
+    return index.exists(field, value)
+
+
+def _start_on_request(sender, **kwargs):
+    index.start()
+    request_started.disconnect(_start_on_request, dispatch_uid='start_existence_index')
+
+
+if enabled:
+    request_started.connect(_start_on_request, dispatch_uid='start_existence_index')
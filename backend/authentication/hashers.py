@@ -0,0 +1,60 @@
+"""
+Password hashers whose cost comes from the hasher profile.
+
+`manage.py calibrate_hashers` measures the KDFs on the current machine and
+writes a profile (PASSWORD_HASHER_PROFILE_PATH) with the parameters that hit
+the target latency; settings loads it into PASSWORD_HASHER_PROFILE and puts
+the preferred hasher first in PASSWORD_HASHERS. A parameter missing from the
+profile falls back to Django's default.
+
+The classes keep Django's algorithm names, so existing hashes still verify.
+Hashes made with other parameters report must_update, and the login path
+rehashes them with the profiled cost the next time the password is checked
+successfully.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+def profile_params(algorithm):
+    return settings.PASSWORD_HASHER_PROFILE.get('hashers', {}).get(algorithm, {})
+
+
+class ProfiledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return profile_params(self.algorithm).get('iterations', PBKDF2PasswordHasher.iterations)
+
+
+class ProfiledArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return profile_params(self.algorithm).get('time_cost', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return profile_params(self.algorithm).get('memory_cost', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return profile_params(self.algorithm).get('parallelism', Argon2PasswordHasher.parallelism)
+
+
+class ProfiledScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return profile_params(self.algorithm).get('work_factor', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return profile_params(self.algorithm).get('block_size', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return profile_params(self.algorithm).get('parallelism', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # Work factors above 2**14 need more than OpenSSL's 32 MiB default
+        return profile_params(self.algorithm).get('maxmem', ScryptPasswordHasher.maxmem)
+
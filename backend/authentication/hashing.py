@@ -0,0 +1,352 @@
+"""
+Password hashing service.
+
+Every KDF call (make_password / check_password) runs in a dedicated process
+pool instead of on the request thread, so a login storm saturates the pool
+rather than every core serving cheap endpoints. The number of jobs that may
+be running or waiting is capped; once the cap is reached new jobs fail fast
+with HashingUnavailable, which DRF turns into 503 with a Retry-After header.
+Jobs lost to a pool process dying fail the same way, and the pool is
+replaced on the next submit.
+
+Settings:
+    PASSWORD_HASHING_WORKERS      pool processes, 0 hashes inline on the caller
+    PASSWORD_HASHING_MAX_QUEUE    jobs allowed to wait for a free process
+    PASSWORD_HASHING_RETRY_AFTER  seconds suggested to rejected clients
+"""
+import asyncio
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import instrumentation, metrics
+
+logger = logging.getLogger(__name__)
+
+queue_wait = metrics.histogram(
+    'auth_hash_queue_wait_seconds', 'Time password hashing jobs waited for a pool process'
+)
+hash_time = metrics.histogram(
+    'auth_hash_seconds', 'Time spent running the password KDF'
+)
+rejected = metrics.counter(
+    'auth_hash_rejected_total', 'Hashing jobs rejected because the pool was saturated'
+)
+
+# Prefixes written by Flask/Werkzeug's generate_password_hash, e.g.
+# "pbkdf2:sha256:600000$salt$hash". Django algorithm names never contain ':',
+# so the prefix alone tells the two formats apart.
+LEGACY_HASH_PREFIXES = ('pbkdf2:', 'scrypt:', 'sha256:')
+
+
+def is_legacy_hash(encoded):
+    return bool(encoded) and encoded.startswith(LEGACY_HASH_PREFIXES)
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy, please try again shortly.'
+    default_code = 'hashing_unavailable'
+
+    def __init__(self, detail=None, wait=None):
+        super().__init__(detail)
+        # DRF's exception handler turns `wait` into a Retry-After header
+        self.wait = wait or settings.PASSWORD_HASHING_RETRY_AFTER
+
+
+# Functions executed inside the pool processes. They must be module level so
+# they can be pickled, and they return their own run time so the caller can
+# split total latency into queue wait and hash time.
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _check_legacy_password(raw_password, encoded):
+    """Verify a hash written by Flask/Werkzeug's generate_password_hash"""
+    try:
+        from werkzeug.security import check_password_hash
+        return check_password_hash(encoded, raw_password)
+    except ImportError:
+        logger.error('Werkzeug not available, cannot verify legacy password hash')
+        return False
+    except Exception:
+        logger.exception('Legacy password verification failed')
+        return False
+
+
+def _make_password_job(raw_password):
+    from django.contrib.auth.hashers import make_password
+
+    started = time.perf_counter()
+    encoded = make_password(raw_password)
+    return encoded, time.perf_counter() - started
+
+
+def _check_password_job(raw_password, encoded):
+    """Return ((is_correct, must_update), seconds)"""
+    from django.contrib.auth.hashers import check_password
+
+    started = time.perf_counter()
+    if is_legacy_hash(encoded):
+        # Any legacy hash that verifies gets rewritten with a Django hasher
+        is_correct = _check_legacy_password(raw_password, encoded)
+        must_update = True
+    else:
+        needs_update = []
+        is_correct = check_password(raw_password, encoded, setter=needs_update.append)
+        must_update = bool(needs_update)
+    return (is_correct, must_update), time.perf_counter() - started
+
+
+class HashingPool:
+    """Bounded front end for a ProcessPoolExecutor running KDF jobs"""
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.capacity = workers + max_queue
+        self.inflight = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),),
+            )
+        return self._executor
+
+    def _acquire(self, jobs=1):
+        with self._lock:
+            if self.workers and self.inflight + jobs > self.capacity:
+                rejected.inc(jobs)
+                raise HashingUnavailable()
+            self.inflight += jobs
+
+    def _release(self, jobs=1):
+        with self._lock:
+            self.inflight -= jobs
+
+    def _discard(self, executor):
+        """Drop a broken executor so the next job starts a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        """Returns (executor, future); a pool found broken is replaced once"""
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed) since the last job
+            self._discard(executor)
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise HashingUnavailable()
+
+    def _broken(self, executor):
+        # A worker died while running or queueing this job: the pool is
+        # rebuilt on the next submit and the caller gets the usual 503
+        logger.warning('Password hashing pool broken, restarting it')
+        self._discard(executor)
+        return HashingUnavailable()
+
+    def run(self, fn, *args):
+        """Run fn(*args) in the pool, blocking until it finishes"""
+        self._acquire()
+        submitted = time.perf_counter()
+        try:
+            if self.workers:
+                executor, future = self._submit(fn, *args)
+                try:
+                    result, elapsed = future.result()
+                except BrokenProcessPool:
+                    raise self._broken(executor)
+            else:
+                result, elapsed = fn(*args)
+        finally:
+            self._release()
+        waited = time.perf_counter() - submitted
+        hash_time.observe(elapsed)
+        queue_wait.observe(max(waited - elapsed, 0.0))
+        instrumentation.record_hash(waited)
+        return result
+
+    async def arun(self, fn, *args):
+        """Like run(), but awaits the result instead of blocking the event loop"""
+        self._acquire()
+        submitted = time.perf_counter()
+        try:
+            if self.workers:
+                executor, future = self._submit(fn, *args)
+                try:
+                    result, elapsed = await asyncio.wrap_future(future)
+                except BrokenProcessPool:
+                    raise self._broken(executor)
+            else:
+                result, elapsed = await sync_to_async(fn, thread_sensitive=False)(*args)
+        finally:
+            self._release()
+        waited = time.perf_counter() - submitted
+        hash_time.observe(elapsed)
+        queue_wait.observe(max(waited - elapsed, 0.0))
+        instrumentation.record_hash(waited)
+        return result
+
+    def map(self, fn, arg_tuples):
+        """
+        Run fn(*args) for every tuple at once, spread over the pool processes.
+        Returns the results in input order. The whole batch is admitted or
+        rejected together, so it must fit within capacity.
+        """
+        jobs = len(arg_tuples)
+        if not jobs:
+            return []
+        self._acquire(jobs)
+        submitted = time.perf_counter()
+        try:
+            if self.workers:
+                submissions = [self._submit(fn, *args) for args in arg_tuples]
+                outcomes = []
+                for executor, future in submissions:
+                    try:
+                        outcomes.append(future.result())
+                    except BrokenProcessPool:
+                        for _, pending in submissions:
+                            pending.cancel()
+                        raise self._broken(executor)
+            else:
+                outcomes = [fn(*args) for args in arg_tuples]
+        finally:
+            self._release(jobs)
+        for _, elapsed in outcomes:
+            hash_time.observe(elapsed)
+        instrumentation.record_hash(time.perf_counter() - submitted)
+        return [result for result, _ in outcomes]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'capacity': self.capacity,
+            'inflight': self.inflight,
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    workers=settings.PASSWORD_HASHING_WORKERS,
+                    max_queue=settings.PASSWORD_HASHING_MAX_QUEUE,
+                )
+    return _pool
+
+
+def _reset_after_fork():
+    # Pool processes belong to the parent; a forked server worker builds its own
+    global _pool
+    _pool = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def make_password(raw_password):
+    """Hash a password with the preferred Django hasher"""
+    if raw_password is None:
+        # Unusable password: no KDF involved
+        from django.contrib.auth.hashers import make_password as django_make_password
+        return django_make_password(None)
+    return get_pool().run(_make_password_job, raw_password)
+
+
+_dummy_password = None
+
+
+def dummy_password():
+    """
+    Encoded password for a random secret. Checking a password against it
+    costs a full KDF run, so unknown accounts take as long as real ones.
+    """
+    global _dummy_password
+    if _dummy_password is None:
+        _dummy_password = make_password(secrets.token_urlsafe(16))
+    return _dummy_password
+
+
+def check_password(raw_password, encoded):
+    """
+    Verify raw_password against encoded (Django or legacy Werkzeug format).
+
+    Returns (is_correct, must_update); must_update means the hash should be
+    rewritten with the current hasher now that the raw password is known.
+    """
+    if raw_password is None or not encoded:
+        return False, False
+    return get_pool().run(_check_password_job, raw_password, encoded)
+
+
+def check_passwords(pairs):
+    """check_password() for many (raw_password, encoded) pairs, hashed in parallel"""
+    results = [(False, False)] * len(pairs)
+    todo = [i for i, (raw_password, encoded) in enumerate(pairs) if raw_password is not None and encoded]
+    checked = get_pool().map(_check_password_job, [pairs[i] for i in todo])
+    for i, result in zip(todo, checked):
+        results[i] = result
+    return results
+
+
+async def amake_password(raw_password):
+    if raw_password is None:
+        return make_password(None)
+    return await get_pool().arun(_make_password_job, raw_password)
+
+
+async def acheck_password(raw_password, encoded):
+    if raw_password is None or not encoded:
+        return False, False
+    return await get_pool().arun(_check_password_job, raw_password, encoded)
+
+
+def stats():
+    """Pool occupancy plus the queue-wait and hash-time histograms"""
+    return {
+        'pool': get_pool().stats(),
+        'queue_wait_seconds': queue_wait.snapshot(),
+        'hash_seconds': hash_time.snapshot(),
+        'rejected': rejected.value,
+    }
@@ -0,0 +1,206 @@
+"""
+Per-request performance instrumentation.
+
+RequestMetricsMiddleware sits first in MIDDLEWARE and splits each request's
+wall time into the parts that usually explain a slow login: SQL (query count
+and time, via an execute_wrapper installed on every connection), password hashing
+(reported by the hashing pool through record_hash()) and session I/O
+(the SQL that touches django_session). Everything is recorded per view into
+the histograms below and exported by /api/metrics/.
+
+With PROFILE_SAMPLE_RATE set, that fraction of requests runs under cProfile
+and the profiles of the slowest ones are kept in PROFILE_DIR as .prof files
+(open them with `python -m pstats`); requests served on the async path are
+not profiled. With ENABLED off the middleware removes itself from the stack
+at startup.
+"""
+import contextvars
+import heapq
+import os
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+_VIEW = ('view',)
+
+request_seconds = metrics.histogram(
+    'http_request_duration_seconds', 'Wall time per request, middleware included', labelnames=_VIEW
+)
+db_seconds = metrics.histogram(
+    'http_request_db_seconds', 'Time spent executing SQL per request', labelnames=_VIEW
+)
+db_queries = metrics.histogram(
+    'http_request_db_queries', 'SQL queries per request',
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100), labelnames=_VIEW,
+)
+hash_seconds = metrics.histogram(
+    'http_request_hash_seconds', 'Time blocked on password hashing per request, queue wait included',
+    labelnames=_VIEW,
+)
+session_seconds = metrics.histogram(
+    'http_request_session_seconds', 'Time spent on django_session SQL per request', labelnames=_VIEW
+)
+requests_total = metrics.counter(
+    'http_requests_total', 'Requests by view and status code', labelnames=('view', 'status')
+)
+
+
+class RequestStats:
+    __slots__ = ('db_seconds', 'db_queries', 'hash_seconds', 'session_seconds')
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.hash_seconds = 0.0
+        self.session_seconds = 0.0
+
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+def record_hash(seconds):
+    """Attribute hashing time to the request being served, if it is instrumented"""
+    stats = _current.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    # Installed once on every connection; sync_to_async copies the context,
+    # so queries run in a worker thread still find the request's stats
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.db_seconds += elapsed
+        stats.db_queries += 1
+        if 'django_session' in sql:
+            stats.session_seconds += elapsed
+
+
+def _install_wrapper(connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+class SlowestProfiles:
+    """Keeps the cProfile dumps of the N slowest sampled requests on disk"""
+
+    def __init__(self, directory, keep):
+        self.directory = directory
+        self.keep = keep
+        self._heap = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def offer(self, duration, view, profiler):
+        with self._lock:
+            if len(self._heap) >= self.keep and duration <= self._heap[0][0]:
+                return None
+            path = os.path.join(
+                self.directory, f'{view.replace(":", "-")}-{duration * 1000:.0f}ms-{time.time_ns()}.prof'
+            )
+            profiler.dump_stats(path)
+            heapq.heappush(self._heap, (duration, path))
+            if len(self._heap) > self.keep:
+                _, evicted = heapq.heappop(self._heap)
+                try:
+                    os.remove(evicted)
+                except FileNotFoundError:
+                    pass
+            return path
+
+
+def _view_name(request):
+    # The route name rather than the path keeps label cardinality bounded
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.REQUEST_METRICS
+        if not config.get('ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Connections are per thread (the async ORM uses its own), so the
+        # wrapper goes on each one as it connects, plus those already open here
+        connection_created.connect(_install_wrapper, dispatch_uid='request_metrics_execute_wrapper')
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+        self.sample_rate = config.get('PROFILE_SAMPLE_RATE', 0)
+        self.profiles = None
+        if self.sample_rate:
+            self.profiles = SlowestProfiles(config['PROFILE_DIR'], config.get('PROFILE_KEEP', 20))
+
+    def _observe(self, request, response, stats, duration, profiler=None):
+        view = _view_name(request)
+        request_seconds.labels(view).observe(duration)
+        db_seconds.labels(view).observe(stats.db_seconds)
+        db_queries.labels(view).observe(stats.db_queries)
+        hash_seconds.labels(view).observe(stats.hash_seconds)
+        session_seconds.labels(view).observe(stats.session_seconds)
+        requests_total.labels(view, str(response.status_code)).inc()
+        if profiler is not None:
+            self.profiles.offer(duration, view, profiler)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        profiler = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                profiler = None
+
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            _current.reset(token)
+
+        self._observe(request, response, stats, duration, profiler)
+        return response
+
+    async def __acall__(self, request):
+        # Not profiled: cProfile follows the event loop thread, which runs
+        # other requests' coroutines in between this one's awaits
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            _current.reset(token)
+
+        self._observe(request, response, stats, duration)
+        return response
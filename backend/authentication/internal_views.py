@@ -0,0 +1,215 @@
+"""
+Endpoints for internal services and admin tooling, guarded by
+IsInternalService rather than a user session.
+"""
+import csv
+import io
+import json
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+
+from . import hashing, throttling
+from .models import User
+from .permissions import IsInternalService
+from .serializers import CredentialBatchSerializer, UserBatchLookupSerializer, UserListQuerySerializer
+
+LIST_FIELDS = ('id', 'username', 'email', 'created_at', 'last_login')
+
+_datetime_field = DateTimeField()
+
+
+def _filtered_users(params):
+    queryset = User.objects.all()
+    if 'email' in params:
+        queryset = queryset.filter(email__startswith=params['email'])
+    if 'username' in params:
+        queryset = queryset.filter(username__startswith=params['username'])
+    if 'created_after' in params:
+        queryset = queryset.filter(created_at__gte=params['created_after'])
+    if 'created_before' in params:
+        queryset = queryset.filter(created_at__lt=params['created_before'])
+    return queryset
+
+
+def _page(queryset, cursor, limit):
+    """One keyset page: rows with id > cursor in id order, never an OFFSET"""
+    rows = list(queryset.filter(id__gt=cursor).order_by('id').values(*LIST_FIELDS)[:limit])
+    for row in rows:
+        _format_row(row)
+    return rows
+
+
+def _format_row(row):
+    row['created_at'] = _datetime_field.to_representation(row['created_at'])
+    row['last_login'] = _datetime_field.to_representation(row['last_login'])
+    return row
+
+
+def _iter_rows(queryset, cursor, chunk_size):
+    """
+    Every matching row, fetched in keyset chunks.
+
+    PyMySQL buffers a whole result set client side even for .iterator(),
+    so chunked keyset queries are what keeps memory flat for large exports.
+    """
+    while True:
+        rows = _page(queryset, cursor, chunk_size)
+        if not rows:
+            return
+        yield from rows
+        cursor = rows[-1]['id']
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=LIST_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+@api_view(['GET'])
+@permission_classes([IsInternalService])
+def list_users(request):
+    """
+    Keyset-paginated user listing.
+
+    Pass the returned next_cursor back as ?cursor= to get the following page.
+    ?export=ndjson|csv streams every matching row instead of one page.
+    """
+    query = UserListQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+    queryset = _filtered_users(params)
+
+    export = params.get('export')
+    if export:
+        rows = _iter_rows(queryset, params['cursor'], settings.USER_EXPORT_CHUNK_SIZE)
+        if export == 'csv':
+            response = StreamingHttpResponse(_csv_lines(rows), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="users.csv"'
+        else:
+            response = StreamingHttpResponse(_ndjson_lines(rows), content_type='application/x-ndjson')
+        return response
+
+    rows = _page(queryset, params['cursor'], params['limit'])
+    next_cursor = rows[-1]['id'] if len(rows) == params['limit'] else None
+    return Response({
+        'results': rows,
+        'next_cursor': next_cursor,
+    }, status=status.HTTP_200_OK)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+@api_view(['POST'])
+@permission_classes([IsInternalService])
+def lookup_users(request):
+    """
+    Resolve many users in one request: {"ids": [...], "emails": [...]}.
+
+    Each list is answered with one IN query, and the response lists hold the
+    matching user or null at the same position as the input.
+    """
+    started = time.perf_counter()
+    serializer = UserBatchLookupSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    ids, emails = serializer.validated_data['ids'], serializer.validated_data['emails']
+
+    by_id, by_email = {}, {}
+    if ids:
+        by_id = {row['id']: _format_row(row) for row in User.objects.filter(id__in=ids).values(*LIST_FIELDS)}
+    if emails:
+        by_email = {row['email']: _format_row(row) for row in User.objects.filter(email__in=emails).values(*LIST_FIELDS)}
+    return Response({
+        'ids': [by_id.get(user_id) for user_id in ids],
+        'emails': [by_email.get(email) for email in emails],
+        'stats': {
+            'requested': len(ids) + len(emails),
+            'found': sum(user_id in by_id for user_id in ids) + sum(email in by_email for email in emails),
+            'ms': _ms(time.perf_counter() - started),
+        },
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsInternalService])
+def verify_credentials(request):
+    """
+    Check many email/password pairs in one request:
+    {"credentials": [{"email": ..., "password": ...}, ...]}.
+
+    Users are loaded with a single email__in query and the password checks
+    run in parallel on the hashing pool. Results come back in input order
+    with the same answer /api/login/ would give for each pair: unknown
+    emails are checked against a dummy hash so they cost as much as real
+    ones, and every pair counts against the login throttle's per-account
+    rate and the lockouts for the calling service's address. Pairs the
+    throttle rejects are not checked and carry retry_after instead.
+    """
+    started = time.perf_counter()
+    serializer = CredentialBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    credentials = serializer.validated_data['credentials']
+
+    throttle = throttling.get_throttle()
+    ip = throttling.client_ip(request, settings.LOGIN_THROTTLE.get('IP_HEADER'))
+    waits = [
+        throttle.check(ip, c['email'].strip().lower(), scopes=('email',)) if throttle else 0
+        for c in credentials
+    ]
+    users = {user.email: user for user in User.objects.filter(email__in={c['email'] for c in credentials})}
+    loaded = time.perf_counter()
+    dummy = hashing.dummy_password()
+    checks = iter(hashing.check_passwords([
+        (c['password'], users[c['email']].password if c['email'] in users else dummy)
+        for c, wait in zip(credentials, waits) if not wait
+    ]))
+
+    results = []
+    for credential, wait in zip(credentials, waits):
+        result = {'email': credential['email'], 'valid': False, 'user_id': None}
+        if wait:
+            result['retry_after'] = wait
+            results.append(result)
+            continue
+        is_correct, _ = next(checks)
+        user = users.get(credential['email'])
+        if is_correct and user.is_active:
+            result.update(valid=True, user_id=user.id)
+        if throttle:
+            email = credential['email'].strip().lower()
+            if result['valid']:
+                throttle.record_success(email, ip)
+            else:
+                throttle.record_failure(email, ip)
+        results.append(result)
+    return Response({
+        'results': results,
+        'stats': {
+            'requested': len(credentials),
+            'valid': sum(result['valid'] for result in results),
+            'throttled': sum(bool(wait) for wait in waits),
+            'db_ms': _ms(loaded - started),
+            'ms': _ms(time.perf_counter() - started),
+        },
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,81 @@
+"""
+Buffered last_login updates.
+
+django.contrib.auth's update_last_login receiver saves the user row on every
+login. With LAST_LOGIN_BATCHING on, that receiver is replaced by one that
+only records (user id, timestamp) in memory; a PeriodicTask writes the
+buffer with bulk_update every LAST_LOGIN_FLUSH_INTERVAL seconds, as soon as
+LAST_LOGIN_FLUSH_SIZE users are waiting, and when the process exits.
+
+last_login in the database can therefore lag by up to one interval, and
+entries buffered by a process that is killed outright are lost.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+from .background import PeriodicTask
+
+flushed = metrics.counter('auth_last_login_flushed_total', 'Buffered last_login values written to the database')
+flush_seconds = metrics.histogram('auth_last_login_flush_seconds', 'Time spent writing one last_login batch')
+
+
+class LastLoginBuffer:
+    def __init__(self, interval, flush_size, batch_size=500):
+        self.flush_size = flush_size
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.task = PeriodicTask('last-login-flush', interval, self.flush)
+
+    def record(self, user_id, when):
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or when > previous:
+                self._pending[user_id] = when
+            size = len(self._pending)
+        self.task.ensure_started()
+        if size >= self.flush_size:
+            self.task.trigger()
+
+    def flush(self):
+        """Write every buffered value; returns how many rows were updated"""
+        from .models import User
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        users = [User(pk=user_id, last_login=when) for user_id, when in pending.items()]
+        started = time.perf_counter()
+        try:
+            User.objects.bulk_update(users, ['last_login'], batch_size=self.batch_size)
+        except Exception:
+            # Put the values back, unless a newer login was recorded meanwhile
+            with self._lock:
+                for user_id, when in pending.items():
+                    if user_id not in self._pending or when > self._pending[user_id]:
+                        self._pending[user_id] = when
+            raise
+        flush_seconds.observe(time.perf_counter() - started)
+        flushed.inc(len(users))
+        return len(users)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+buffer = LastLoginBuffer(
+    interval=settings.LAST_LOGIN_FLUSH_INTERVAL,
+    flush_size=settings.LAST_LOGIN_FLUSH_SIZE,
+)
+
+
+def buffered_update_last_login(sender, user, **kwargs):
+    """Drop-in for django.contrib.auth.models.update_last_login"""
+    user.last_login = timezone.now()
+    buffer.record(user.pk, user.last_login)
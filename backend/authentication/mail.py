@@ -0,0 +1,131 @@
+"""
+Email rendering.
+
+Messages are Django templates under templates/authentication/email/<locale>/:
+<name>_subject.txt, <name>.txt and an optional <name>.html. They are
+loaded by a standalone template engine, so they do not depend on the
+TEMPLATES setting (the API-only profile has none). Only the HTML part is
+autoescaped. Each template is parsed once per process and kept per
+locale, so a render only fills in the compiled nodes.
+
+A locale is picked from the request's Accept-Language header among the
+directories that exist (exact tag first, then the primary language), and
+MAIL_DEFAULT_LOCALE is the fallback. Links point at FRONTEND_BASE_URL.
+
+render() builds one message; render_many() builds a batch, resolving each
+locale's templates once, for bulk sends such as forced password rotation.
+benchmarks/mail_render.py measures both.
+"""
+import os
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.template import Context, Engine, TemplateDoesNotExist
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'authentication', 'email')
+
+_engine = Engine(dirs=[TEMPLATE_DIR])
+
+
+class RenderedMessage(NamedTuple):
+    subject: str
+    text: str
+    html: str  # '' when the message has no HTML part
+
+
+LOCALES = frozenset(
+    entry for entry in os.listdir(TEMPLATE_DIR) if os.path.isdir(os.path.join(TEMPLATE_DIR, entry))
+)
+
+
+@lru_cache(maxsize=None)
+def _templates(name, locale):
+    """(subject, text, html or None) compiled templates for name in locale"""
+    try:
+        html = _engine.get_template(f'{locale}/{name}.html')
+    except TemplateDoesNotExist:
+        html = None
+    return (
+        _engine.get_template(f'{locale}/{name}_subject.txt'),
+        _engine.get_template(f'{locale}/{name}.txt'),
+        html,
+    )
+
+
+@lru_cache(maxsize=256)
+def select_locale(accept_language=None):
+    """Best available locale for an Accept-Language header value"""
+    default = settings.MAIL_DEFAULT_LOCALE
+    if not accept_language:
+        return default
+    ranked = []
+    for position, item in enumerate(accept_language.split(',')):
+        tag, _, params = item.strip().lower().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        if tag and quality > 0:
+            ranked.append((-quality, position, tag))
+    for _, _, tag in sorted(ranked):
+        if tag in LOCALES:
+            return tag
+        primary = tag.split('-')[0]
+        if primary in LOCALES:
+            return primary
+        for locale in sorted(LOCALES):
+            if locale.split('-')[0] == primary:
+                return locale
+    return default
+
+
+def _render(templates, context):
+    subject, text, html = templates
+    context = Context(context, autoescape=False)
+    rendered_subject = ' '.join(subject.render(context).split())
+    rendered_text = text.render(context)
+    if html is None:
+        return RenderedMessage(rendered_subject, rendered_text, '')
+    context.autoescape = True
+    return RenderedMessage(rendered_subject, rendered_text, html.render(context))
+
+
+def render(name, context, locale=None):
+    """Render one message; locale defaults to MAIL_DEFAULT_LOCALE"""
+    return _render(_templates(name, locale or settings.MAIL_DEFAULT_LOCALE), context)
+
+
+def render_many(name, items):
+    """Render a batch of (context, locale) pairs, in order"""
+    default = settings.MAIL_DEFAULT_LOCALE
+    by_locale = {}
+    rendered = []
+    for context, locale in items:
+        locale = locale or default
+        templates = by_locale.get(locale)
+        if templates is None:
+            templates = by_locale[locale] = _templates(name, locale)
+        rendered.append(_render(templates, context))
+    return rendered
+
+
+def frontend_url(path, **params):
+    url = settings.FRONTEND_BASE_URL.rstrip('/') + path
+    return f'{url}?{urlencode(params)}' if params else url
+
+
+def password_reset_context(user, raw_token):
+    return {
+        'username': user.username,
+        'reset_url': frontend_url('/reset-password', token=raw_token),
+        'lifetime_minutes': settings.PASSWORD_RESET_TOKEN_LIFETIME // 60,
+    }
+
+
+def password_reset(user, raw_token, locale=None):
+    """The password reset email for user, linking to the frontend's reset page"""
+    return render('password_reset', password_reset_context(user, raw_token), locale)
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.models import AuthEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarise the authentication event log: events by kind, successful logins per '
+        'minute and the IPs with the highest login failure ratio.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, help='How far back to look')
+        parser.add_argument('--min-attempts', type=int, default=10,
+                            help='Only rank IPs with at least this many login attempts')
+        parser.add_argument('--limit', type=int, default=20, help='IPs to list')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(minutes=options['minutes'])
+        events = AuthEvent.objects.all()
+
+        self.stdout.write(f'Events since {since:%Y-%m-%d %H:%M} UTC')
+        for kind, count in sorted(events.counts_by_kind(since).items()):
+            self.stdout.write(f'  {kind:<24} {count:>8}')
+
+        per_minute = events.logins_per_minute(since)
+        if per_minute:
+            counts = [logins for _, logins in per_minute]
+            peak_minute, peak = max(per_minute, key=lambda row: row[1])
+            self.stdout.write(
+                f'\nLogins per minute: mean {sum(counts) / options["minutes"]:.1f}, '
+                f'peak {peak} at {peak_minute:%H:%M}'
+            )
+
+        rows = events.failure_ratio_by_ip(since, options['min_attempts'], options['limit'])
+        if rows:
+            self.stdout.write(f'\n{"ip":<40} {"attempts":>8} {"failures":>8} {"ratio":>6}')
+            for row in rows:
+                self.stdout.write(
+                    f'{row["ip"] or "-":<40} {row["attempts"]:>8} {row["failures"]:>8} {row["failure_ratio"]:>6.2f}'
+                )
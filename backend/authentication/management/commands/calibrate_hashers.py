@@ -0,0 +1,183 @@
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+from django.core.management.base import BaseCommand, CommandError
+
+PASSWORD = 'calibration-Password-1234'
+
+
+def measure(encode, repeats):
+    """Median seconds per call of encode()"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        encode()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate_pbkdf2(target, repeats, floor):
+    hasher = PBKDF2PasswordHasher()
+    salt = hasher.salt()
+    sample = 100000
+    per_iteration = measure(lambda: hasher.encode(PASSWORD, salt, sample), repeats) / sample
+    # PBKDF2 cost is linear in the iteration count
+    iterations = max(int(round(target / per_iteration, -4)), floor or 10000)
+    seconds = measure(lambda: hasher.encode(PASSWORD, salt, iterations), repeats)
+    return {'iterations': iterations}, seconds
+
+
+def calibrate_scrypt(target, repeats, floor):
+    hasher = ScryptPasswordHasher()
+    salt = hasher.salt()
+    block_size, parallelism = hasher.block_size, hasher.parallelism
+
+    def run(work_factor):
+        hasher.maxmem = 256 * work_factor * block_size * parallelism
+        return measure(lambda: hasher.encode(PASSWORD, salt, work_factor, block_size, parallelism), repeats)
+
+    # Work factor must be a power of two: double while the next step still fits
+    work_factor = floor or 2 ** 12
+    seconds = run(work_factor)
+    while True:
+        candidate = run(work_factor * 2)
+        if candidate > target:
+            break
+        work_factor, seconds = work_factor * 2, candidate
+    return {
+        'work_factor': work_factor,
+        'block_size': block_size,
+        'parallelism': parallelism,
+        'maxmem': 256 * work_factor * block_size * parallelism,
+    }, seconds
+
+
+def calibrate_argon2(target, repeats, floor):
+    hasher = Argon2PasswordHasher()
+    hasher._load_library()
+    salt = hasher.salt()
+
+    def run(time_cost):
+        hasher.time_cost = time_cost
+        return measure(lambda: hasher.encode(PASSWORD, salt), repeats)
+
+    time_cost = floor or 1
+    seconds = run(time_cost)
+    while True:
+        candidate = run(time_cost + 1)
+        if candidate > target:
+            break
+        time_cost, seconds = time_cost + 1, candidate
+    return {
+        'time_cost': time_cost,
+        'memory_cost': hasher.memory_cost,
+        'parallelism': hasher.parallelism,
+    }, seconds
+
+
+CALIBRATORS = {
+    # algorithm: (calibrate, parameter that must not drop below Django's default)
+    'pbkdf2_sha256': (calibrate_pbkdf2, PBKDF2PasswordHasher.iterations),
+    'argon2': (calibrate_argon2, Argon2PasswordHasher.time_cost),
+    'scrypt': (calibrate_scrypt, ScryptPasswordHasher.work_factor),
+}
+
+
+def legacy_verify_costs(repeats):
+    """Seconds to verify Werkzeug hashes still stored for un-migrated accounts"""
+    from werkzeug.security import check_password_hash, generate_password_hash
+
+    costs = {}
+    for method in ('pbkdf2:sha256', 'scrypt'):
+        encoded = generate_password_hash(PASSWORD, method=method)
+        costs[encoded.split('$', 1)[0]] = measure(lambda: check_password_hash(encoded, PASSWORD), repeats)
+    return costs
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the password hashers on this machine, recommend parameters that hit a '
+        'target latency per hash, and write the hasher profile loaded by settings. Existing '
+        'hashes are upgraded to the new parameters at the next successful login.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250.0,
+                            help='Target time for one hash on one core')
+        parser.add_argument('--min-throughput', type=float,
+                            help='Hashes per second each core must sustain; lowers the target if needed')
+        parser.add_argument('--preferred', choices=list(CALIBRATORS),
+                            help='Algorithm new hashes use (default: keep the current one)')
+        parser.add_argument('--allow-weaker', action='store_true',
+                            help="Allow parameters below Django's defaults on slow hardware")
+        parser.add_argument('--repeats', type=int, default=3)
+        parser.add_argument('--output', default=settings.PASSWORD_HASHER_PROFILE_PATH)
+        parser.add_argument('--dry-run', action='store_true', help='Print the recommendation only')
+
+    def handle(self, *args, **options):
+        target_ms = options['target_ms']
+        if options['min_throughput']:
+            target_ms = min(target_ms, 1000 / options['min_throughput'])
+        target = target_ms / 1000
+        repeats = options['repeats']
+        workers = settings.PASSWORD_HASHING_WORKERS or 1
+
+        self.stdout.write(f'Target {target_ms:.0f} ms per hash, {workers} hashing workers\n')
+        self.stdout.write(f'{"algorithm":<22} {"ms/hash":>8} {"hash/s/core":>12} {"hash/s pool":>12}  parameters')
+        hashers = {}
+        for algorithm, (calibrate, default) in CALIBRATORS.items():
+            try:
+                params, seconds = calibrate(target, repeats, None if options['allow_weaker'] else default)
+            except (ImportError, ValueError) as e:
+                self.stdout.write(f'{algorithm:<22} unavailable ({e})')
+                continue
+            hashers[algorithm] = {
+                **params,
+                'ms': round(seconds * 1000, 1),
+                'hashes_per_second_per_core': round(1 / seconds, 2),
+            }
+            self.stdout.write(
+                f'{algorithm:<22} {seconds * 1000:>8.1f} {1 / seconds:>12.2f} {workers / seconds:>12.2f}  '
+                + ', '.join(f'{key}={value}' for key, value in params.items())
+            )
+            if seconds > target * 1.2:
+                self.stdout.write(self.style.WARNING(
+                    f"  {algorithm} cannot reach {target_ms:.0f} ms without going below Django's "
+                    'defaults (see --allow-weaker)'
+                ))
+
+        try:
+            for method, seconds in legacy_verify_costs(repeats).items():
+                self.stdout.write(f'{method:<22} {seconds * 1000:>8.1f} {1 / seconds:>12.2f} '
+                                  f'{workers / seconds:>12.2f}  legacy Werkzeug, verify only')
+        except ImportError:
+            self.stdout.write('Werkzeug not installed; legacy hash verification not measured')
+
+        preferred = options['preferred'] or settings.PASSWORD_HASHER_PROFILE.get('preferred', 'pbkdf2_sha256')
+        if preferred not in hashers:
+            raise CommandError(f'{preferred} is not available on this machine')
+
+        profile = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'machine': {'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+            'target_ms': target_ms,
+            'preferred': preferred,
+            'hashers': hashers,
+        }
+        if options['dry_run']:
+            self.stdout.write(json.dumps(profile, indent=2))
+            return
+
+        tmp_path = f"{options['output']}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f, indent=2)
+        os.replace(tmp_path, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['output']} (new hashes use {preferred}); restart the server to load it"
+        ))
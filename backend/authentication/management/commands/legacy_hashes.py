@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import User
+
+
+class Command(BaseCommand):
+    help = 'Report how many accounts still use a legacy Flask/Werkzeug password hash'
+
+    def handle(self, *args, **options):
+        legacy = User.objects.legacy_hash_count()
+        total = User.objects.count()
+        self.stdout.write(f'{legacy} of {total} accounts still use a legacy password hash')
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from authentication import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Maximum number of messages sent per SMTP connection',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help='Give up on a message after this many failed deliveries',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help='Seconds to sleep when the outbox is empty',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain everything that is currently due and exit',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_attempts = options['max_attempts']
+        interval = options['interval']
+
+        self.stdout.write(f'Outbox worker started (batch size {batch_size})')
+        try:
+            while True:
+                sent, failed = outbox.drain(batch_size=batch_size, max_attempts=max_attempts)
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent}, failed {failed}')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Outbox worker stopped')
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from authentication import sweeper
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions, expired or used password reset tokens and auth events '
+        "older than AUTH_EVENTS['RETENTION_DAYS'] in small primary-key batches, pausing "
+        'between batches to keep lock times short.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SWEEP_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=settings.SWEEP_PAUSE,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--only', nargs='+', choices=list(sweeper.TARGETS),
+                            help='Sweep only these targets')
+
+    def handle(self, *args, **options):
+        targets = options['only'] or list(sweeper.TARGETS)
+        results = sweeper.sweep(targets, options['batch_size'], options['pause'])
+        for target in targets:
+            if target not in results:
+                self.stdout.write(f'{target}: skipped (not stored in the database)')
+                continue
+            rows, seconds = results[target]
+            rate = rows / seconds if seconds else 0
+            self.stdout.write(f'{target}: {rows} rows purged in {seconds:.2f}s ({rate:.0f} rows/s)')
+        self.stdout.write(self.style.SUCCESS(f'Purged {sum(rows for rows, _ in results.values())} rows'))
@@ -0,0 +1,156 @@
+"""
+Lightweight in-process metrics.
+
+Counters and histograms are plain Python objects guarded by a lock, cheap
+enough to update on every request. Everything created through counter() or
+histogram() is kept in REGISTRY so it can be exported in one place, either
+as a dict (snapshot()) or in the Prometheus text format (render()).
+
+Metrics declared with labelnames hold one child series per combination of
+label values; record into them with metric.labels(*values).
+"""
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = {}
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """The child series for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def series(self):
+        """(labels dict, unlabelled metric) pairs for every series"""
+        if not self.labelnames:
+            return [({}, self)]
+        return [(dict(zip(self.labelnames, values)), child) for values, child in list(self._children.items())]
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self._snapshot()
+        return {'series': [dict(labels=labels, **child._snapshot()) for labels, child in self.series()]}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0
+
+    def _new_child(self):
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def _snapshot(self):
+        return {'value': self.value}
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation, self.buckets)
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def _snapshot(self):
+        """Cumulative bucket counts, as exported by Prometheus"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self.sum, self.count
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {'count': count, 'sum': total, 'buckets': cumulative}
+
+
+def _register(cls, name, *args):
+    with _registry_lock:
+        if name not in REGISTRY:
+            REGISTRY[name] = cls(name, *args)
+        return REGISTRY[name]
+
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter, name, documentation, labelnames)
+
+
+def histogram(name, documentation, buckets=DEFAULT_BUCKETS, labelnames=()):
+    return _register(Histogram, name, documentation, buckets, labelnames)
+
+
+def snapshot():
+    """Current value of every registered metric, keyed by name"""
+    return {name: metric.snapshot() for name, metric in list(REGISTRY.items())}
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(labels, **extra):
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items()) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        lines.append(f'# HELP {name} {_escape(metric.documentation)}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, series in metric.series():
+            data = series._snapshot()
+            if metric.kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {_number(data["value"])}')
+                continue
+            for bound, count in data['buckets']:
+                lines.append(f'{name}_bucket{_labels(labels, le=_number(bound))} {count}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(data["sum"])}')
+            lines.append(f'{name}_count{_labels(labels)} {data["count"]}')
+    return '\n'.join(lines) + '\n'
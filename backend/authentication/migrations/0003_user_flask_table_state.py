@@ -0,0 +1,105 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    """
+    Bring the migration state in line with the models.
+
+    0001_initial describes Django's default user, but User maps onto the
+    existing Flask `user` table, which already has these columns. Only the
+    state is changed here so later migrations (foreign keys to User, column
+    changes on `user`) target the real table.
+    """
+
+    dependencies = [
+        ('authentication', '0002_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterModelOptions(
+                    name='user',
+                    options={},
+                ),
+                migrations.AlterModelManagers(
+                    name='user',
+                    managers=[
+                    ],
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='date_joined',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='first_name',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='groups',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='is_active',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='is_staff',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='is_superuser',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='last_name',
+                ),
+                migrations.RemoveField(
+                    model_name='user',
+                    name='user_permissions',
+                ),
+                migrations.AddField(
+                    model_name='user',
+                    name='created_at',
+                    field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+                    preserve_default=False,
+                ),
+                migrations.AddField(
+                    model_name='user',
+                    name='reset_token',
+                    field=models.CharField(blank=True, max_length=100, null=True),
+                ),
+                migrations.AddField(
+                    model_name='user',
+                    name='reset_token_expiry',
+                    field=models.DateTimeField(blank=True, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='email',
+                    field=models.CharField(max_length=150, unique=True),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='last_login',
+                    field=models.DateTimeField(blank=True, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='password',
+                    field=models.CharField(max_length=255),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='username',
+                    field=models.CharField(max_length=150, unique=True),
+                ),
+                migrations.AlterModelTable(
+                    name='user',
+                    table='user',
+                ),
+            ],
+        ),
+    ]
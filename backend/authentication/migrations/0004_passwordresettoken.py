@@ -0,0 +1,67 @@
+from datetime import timedelta
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def copy_reset_tokens(apps, schema_editor):
+    """Carry over outstanding User.reset_token values as digests"""
+    User = apps.get_model('authentication', 'User')
+    PasswordResetToken = apps.get_model('authentication', 'PasswordResetToken')
+    now = timezone.now()
+    outstanding = (
+        User.objects.using(schema_editor.connection.alias)
+        .filter(reset_token__isnull=False)
+        .exclude(reset_token='')
+        .values_list('pk', 'reset_token', 'reset_token_expiry')
+    )
+    PasswordResetToken.objects.using(schema_editor.connection.alias).bulk_create(
+        [
+            PasswordResetToken(
+                user_id=pk,
+                token_digest=hashlib.sha256(token.encode()).hexdigest(),
+                # Tokens without an expiry never expired before; give them the
+                # standard lifetime from now instead of keeping them forever
+                expires_at=expiry or now + timedelta(hours=1),
+            )
+            for pk, token, expiry in outstanding.iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_user_flask_table_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasswordResetToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_digest', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reset_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'password_reset_token',
+            },
+        ),
+        migrations.RunPython(copy_reset_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_token_expiry',
+        ),
+    ]
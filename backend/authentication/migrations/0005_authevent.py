@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_passwordresettoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('login', 'Login'), ('login_failed', 'Failed login'), ('login_throttled', 'Throttled login'), ('register', 'Registration'), ('password_change', 'Password change'), ('password_change_failed', 'Failed password change'), ('reset_request', 'Password reset request'), ('reset_complete', 'Password reset'), ('reset_failed', 'Failed password reset')], max_length=32)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('email', models.CharField(blank=True, default='', max_length=150)),
+                ('ip', models.GenericIPAddressField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'auth_event',
+                'indexes': [
+                    models.Index(fields=['kind', 'created_at'], name='auth_event_kind_idx'),
+                    models.Index(fields=['ip', 'created_at'], name='auth_event_ip_idx'),
+                    models.Index(fields=['created_at'], name='auth_event_created_idx'),
+                ],
+            },
+        ),
+    ]
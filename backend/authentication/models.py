@@ -1,6 +1,14 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 
+from . import hashing
+
 class UserManager(BaseUserManager):
     def create_user(self, email, username, password=None):
         if not email:
@@ -25,12 +33,17 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def legacy_hash_count(self):
+        """Number of accounts still on a Flask/Werkzeug password hash"""
+        legacy = models.Q()
+        for prefix in hashing.LEGACY_HASH_PREFIXES:
+            legacy |= models.Q(password__startswith=prefix)
+        return self.filter(legacy).count()
+
 class User(AbstractBaseUser):
     username = models.CharField(unique=True, max_length=150)
     email = models.CharField(unique=True, max_length=150)
     password = models.CharField(max_length=255)  # Flask password hashes
-    reset_token = models.CharField(max_length=100, blank=True, null=True)
-    reset_token_expiry = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(blank=True, null=True)
 
@@ -48,41 +61,26 @@ class User(AbstractBaseUser):
     def check_password(self, raw_password):
         """
         Check password - compatible with both Flask/Werkzeug and Django hashes
+
+        The hash prefix decides which verifier runs, so each check costs
+        exactly one KDF. Once a legacy Werkzeug hash (or a Django hash with
+        outdated parameters) verifies, it is rewritten with the current
+        Django hasher. The KDF itself runs in the hashing pool.
         """
-        from django.contrib.auth.hashers import check_password as django_check_password
-        
-        # First try Django's password checking
-        if django_check_password(raw_password, self.password):
-            return True
-        
-        # If Django check fails, try Flask/Werkzeug password checking
-        try:
-            # Flask uses Werkzeug's security functions
-            # The hash format is usually: method$salt$hash
-            if self.password.startswith('pbkdf2:'):
-                # Werkzeug PBKDF2 format
-                from werkzeug.security import check_password_hash
-                return check_password_hash(self.password, raw_password)
-            elif self.password.startswith('scrypt:') or self.password.startswith('sha256:'):
-                # Other Werkzeug formats
-                from werkzeug.security import check_password_hash
-                return check_password_hash(self.password, raw_password)
-            else:
-                # Fallback: might be a simple hash, try werkzeug anyway
-                from werkzeug.security import check_password_hash
-                return check_password_hash(self.password, raw_password)
-        except ImportError:
-            # Werkzeug not available, fall back to simple comparison
-            print("⚠️  Werkzeug not available, trying basic comparison")
-            return False
-        except Exception as e:
-            print(f"⚠️  Password verification failed: {e}")
-            return False
+        is_correct, must_update = hashing.check_password(raw_password, self.password)
+        if is_correct and must_update:
+            self._upgrade_password(raw_password)
+        return is_correct
+
+    def _upgrade_password(self, raw_password):
+        """Re-hash with the current hasher after a successful check"""
+        self.set_password(raw_password)
+        if self.pk:
+            self.save(update_fields=['password'])
 
     def set_password(self, raw_password):
         """Set password using Django's hasher for new passwords"""
-        from django.contrib.auth.hashers import make_password
-        self.password = make_password(raw_password)
+        self.password = hashing.make_password(raw_password)
 
     # Required methods for Django admin
     def has_perm(self, perm, obj=None):
@@ -90,3 +88,207 @@ class User(AbstractBaseUser):
     
     def has_module_perms(self, app_label):
         return False  # No special permissions for now
+
+
+def reset_token_digest(raw_token):
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+class PasswordResetTokenManager(models.Manager):
+    def _new_token(self, user, lifetime):
+        raw_token = secrets.token_urlsafe(32)
+        lifetime = lifetime or timedelta(seconds=settings.PASSWORD_RESET_TOKEN_LIFETIME)
+        return raw_token, self.model(
+            user=user,
+            token_digest=reset_token_digest(raw_token),
+            expires_at=timezone.now() + lifetime,
+        )
+
+    def issue(self, user, lifetime=None):
+        """Create a reset token for user and return the raw token to email"""
+        raw_token, token = self._new_token(user, lifetime)
+        token.save(force_insert=True, using=self.db)
+        return raw_token
+
+    async def aissue(self, user, lifetime=None):
+        raw_token, token = self._new_token(user, lifetime)
+        await token.asave(force_insert=True, using=self.db)
+        return raw_token
+
+    def lookup(self, raw_token):
+        """Find a token by its raw value (a unique index lookup), or None"""
+        try:
+            return self.select_related('user').get(token_digest=reset_token_digest(raw_token))
+        except self.model.DoesNotExist:
+            return None
+
+    def purge_expired(self, batch_size=1000, pause=0.0):
+        """
+        Delete expired and used tokens in primary-key batches so no single
+        statement holds locks for long. Returns the number of rows deleted.
+        """
+        from .sweeper import delete_in_batches
+
+        dead = models.Q(expires_at__lte=timezone.now()) | models.Q(used_at__isnull=False)
+        return delete_in_batches(self.filter(dead), batch_size, pause)
+
+
+class PasswordResetToken(models.Model):
+    """Single-use password reset token; only a SHA-256 digest is stored"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reset_tokens')
+    token_digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(blank=True, null=True)
+
+    objects = PasswordResetTokenManager()
+
+    class Meta:
+        db_table = 'password_reset_token'
+
+    def __str__(self):
+        return f'Reset token for {self.user_id}'
+
+    @property
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+
+    def consume(self):
+        """
+        Mark the token used. Returns False if it was already used or expired,
+        including by a concurrent request that got there first.
+        """
+        now = timezone.now()
+        updated = PasswordResetToken.objects.filter(
+            pk=self.pk, used_at__isnull=True, expires_at__gt=now,
+        ).update(used_at=now)
+        if updated:
+            self.used_at = now
+        return bool(updated)
+
+
+class EmailOutbox(models.Model):
+    """Outgoing email queued by request handlers and delivered by send_outbox"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')  # sent as a text/html alternative when set
+    from_email = models.CharField(max_length=254, blank=True, null=True)
+    recipient = models.CharField(max_length=254)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        indexes = [
+            # The worker only ever asks "what is due now?"
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject} ({self.status})'
+
+
+class AuthEventQuerySet(models.QuerySet):
+    def logins_per_minute(self, since, until=None):
+        """[(minute, successful logins)] for minutes in [since, until) with at least one login"""
+        from django.db.models.functions import TruncMinute
+
+        events = self.filter(kind=AuthEvent.LOGIN, created_at__gte=since)
+        if until is not None:
+            events = events.filter(created_at__lt=until)
+        return list(
+            events.annotate(minute=TruncMinute('created_at'))
+            .values('minute')
+            .annotate(logins=models.Count('id'))
+            .order_by('minute')
+            .values_list('minute', 'logins')
+        )
+
+    def failure_ratio_by_ip(self, since, min_attempts=10, limit=50):
+        """
+        Login attempts, failures and failure ratio per IP since `since`,
+        worst first, for IPs with at least min_attempts attempts.
+        """
+        attempts = self.filter(kind__in=[AuthEvent.LOGIN, AuthEvent.LOGIN_FAILED], created_at__gte=since)
+        return list(
+            attempts.values('ip')
+            .annotate(
+                attempts=models.Count('id'),
+                failures=models.Count('id', filter=models.Q(kind=AuthEvent.LOGIN_FAILED)),
+            )
+            .filter(attempts__gte=min_attempts)
+            .annotate(failure_ratio=models.ExpressionWrapper(
+                models.F('failures') * 1.0 / models.F('attempts'), output_field=models.FloatField(),
+            ))
+            .order_by('-failure_ratio', '-attempts')[:limit]
+        )
+
+    def counts_by_kind(self, since):
+        """{kind: events since `since`}"""
+        return dict(
+            self.filter(created_at__gte=since).values('kind')
+            .annotate(events=models.Count('id')).values_list('kind', 'events')
+        )
+
+
+class AuthEvent(models.Model):
+    """
+    Append-only record of authentication activity, written in batches by
+    authentication/events.py. user_id is a plain column, not a foreign key,
+    so the log outlives deleted accounts and inserts take no row locks on
+    the user table.
+    """
+    LOGIN = 'login'
+    LOGIN_FAILED = 'login_failed'
+    LOGIN_THROTTLED = 'login_throttled'
+    REGISTER = 'register'
+    PASSWORD_CHANGE = 'password_change'
+    PASSWORD_CHANGE_FAILED = 'password_change_failed'
+    RESET_REQUEST = 'reset_request'
+    RESET_COMPLETE = 'reset_complete'
+    RESET_FAILED = 'reset_failed'
+    KIND_CHOICES = [
+        (LOGIN, 'Login'),
+        (LOGIN_FAILED, 'Failed login'),
+        (LOGIN_THROTTLED, 'Throttled login'),
+        (REGISTER, 'Registration'),
+        (PASSWORD_CHANGE, 'Password change'),
+        (PASSWORD_CHANGE_FAILED, 'Failed password change'),
+        (RESET_REQUEST, 'Password reset request'),
+        (RESET_COMPLETE, 'Password reset'),
+        (RESET_FAILED, 'Failed password reset'),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    user_id = models.BigIntegerField(blank=True, null=True)
+    email = models.CharField(max_length=150, blank=True, default='')
+    ip = models.GenericIPAddressField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = AuthEventQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'auth_event'
+        indexes = [
+            models.Index(fields=['kind', 'created_at'], name='auth_event_kind_idx'),
+            models.Index(fields=['ip', 'created_at'], name='auth_event_ip_idx'),
+            models.Index(fields=['created_at'], name='auth_event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.email or self.user_id} at {self.created_at}'
@@ -0,0 +1,151 @@
+"""
+Durable email outbox.
+
+Request handlers call enqueue() which only inserts a row, so a slow SMTP
+relay never holds a request worker. The send_outbox management command
+calls drain() in a loop and delivers due messages in batches over a single
+reused SMTP connection, retrying failures with exponential backoff.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+def enqueue(subject, body, recipient, from_email=None, html_body=''):
+    """Queue a message for background delivery and return the outbox row"""
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+async def aenqueue(subject, body, recipient, from_email=None, html_body=''):
+    return await EmailOutbox.objects.acreate(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff for the given number of failed attempts"""
+    delay = settings.EMAIL_OUTBOX_RETRY_BACKOFF * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_BACKOFF))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to batch_size due messages to the calling worker.
+
+    Claimed rows are moved to 'sending' with next_attempt_at pushed out by the
+    lease time, so a worker that dies mid-batch only delays those messages
+    until the lease expires instead of losing them.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        due = (
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        batch = list(due)
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[item.pk for item in batch]).update(
+                status=EmailOutbox.STATUS_SENDING,
+                next_attempt_at=lease_until,
+            )
+            for item in batch:
+                item.status = EmailOutbox.STATUS_SENDING
+                item.next_attempt_at = lease_until
+    return batch
+
+
+def _mark_sent(item):
+    item.status = EmailOutbox.STATUS_SENT
+    item.attempts += 1
+    item.sent_at = timezone.now()
+    item.last_error = ''
+    item.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+
+
+def _mark_failed(item, error, max_attempts):
+    item.attempts += 1
+    item.last_error = str(error)[:2000]
+    if item.attempts >= max_attempts:
+        item.status = EmailOutbox.STATUS_FAILED
+    else:
+        item.status = EmailOutbox.STATUS_PENDING
+        item.next_attempt_at = timezone.now() + retry_delay(item.attempts)
+    item.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+
+def _to_message(item, connection):
+    message = EmailMultiAlternatives(
+        subject=item.subject,
+        body=item.body,
+        from_email=item.from_email,
+        to=[item.recipient],
+        connection=connection,
+    )
+    if item.html_body:
+        message.attach_alternative(item.html_body, 'text/html')
+    return message
+
+
+def drain(batch_size=None, max_attempts=None, connection=None):
+    """
+    Deliver one batch of due messages.
+
+    All messages in the batch go out over the same SMTP connection. If a send
+    fails the connection is reopened before continuing, since most SMTP
+    errors leave the session in an unknown state.
+
+    Returns a (sent, failed) tuple.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+    try:
+        connection.open()
+        for item in batch:
+            try:
+                connection.send_messages([_to_message(item, connection)])
+            except Exception as e:
+                _mark_failed(item, e, max_attempts)
+                failed += 1
+                connection.close()
+                connection.open()
+            else:
+                _mark_sent(item)
+                sent += 1
+    except Exception as e:
+        # The relay is unreachable: everything still leased goes back in the
+        # queue with backoff instead of waiting for the lease to expire.
+        for item in batch:
+            if item.status == EmailOutbox.STATUS_SENDING:
+                _mark_failed(item, e, max_attempts)
+                failed += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,17 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class IsInternalService(BasePermission):
+    """
+    Allows requests carrying the shared INTERNAL_API_TOKEN in the
+    X-Internal-Token header. Denies everything when no token is configured.
+    """
+    message = 'A valid internal service token is required.'
+
+    def has_permission(self, request, view):
+        expected = settings.INTERNAL_API_TOKEN
+        provided = request.headers.get('X-Internal-Token', '')
+        return bool(expected) and hmac.compare_digest(provided.encode(), expected.encode())
@@ -0,0 +1,169 @@
+"""
+Cache for serialized /api/profile/ payloads.
+
+Payloads live in an in-process LRU, optionally backed by a shared Django
+cache (PROFILE_CACHE_BACKEND) so processes can share them. Each user has a
+version that is bumped whenever the User row is saved (see signals.py); the
+version is part of the cache key and of the ETag, so stale entries are never
+served and If-None-Match can be answered from the version alone.
+
+Without a shared backend versions are per process, and a save handled by
+one process cannot bump the others. Local versions therefore expire
+PROFILE_CACHE_LOCAL_TTL seconds after they were minted: every process
+re-reads the row at least that often, so another worker's change shows up
+(and its old ETag stops matching) within the TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import metrics
+
+hits = metrics.counter('auth_profile_cache_hits_total', 'Profile payloads served from cache')
+misses = metrics.counter('auth_profile_cache_misses_total', 'Profile payloads that had to be serialized')
+evictions = metrics.counter('auth_profile_cache_evictions_total', 'Profile payloads evicted from the in-process LRU')
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evictions.inc()
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ProfileCache:
+    def __init__(self, maxsize, backend_alias=None, timeout=None, local_ttl=5):
+        self.local = LRUCache(maxsize)
+        self.backend_alias = backend_alias
+        self.timeout = timeout
+        self.local_ttl = local_ttl
+        # Local versions start from a per-process nonce so a restarted
+        # process never reissues an ETag a client saw from its predecessor.
+        self._boot = f'{os.getpid()}.{int(time.time())}'
+        self._versions = {}  # user_id -> (count, minted_at)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        if not self.backend_alias:
+            return None
+        from django.core.cache import caches
+        return caches[self.backend_alias]
+
+    def _version_key(self, user_id):
+        return f'profile:v:{user_id}'
+
+    def _local_version(self, user_id, bump=False):
+        now = time.monotonic()
+        with self._lock:
+            count, minted_at = self._versions.get(user_id, (0, None))
+            if bump or minted_at is None or now - minted_at >= self.local_ttl:
+                count += 1
+                if len(self._versions) >= self.local.maxsize:
+                    self._versions = {
+                        uid: entry for uid, entry in self._versions.items() if now - entry[1] < self.local_ttl
+                    }
+                self._versions[user_id] = (count, now)
+        return f'{self._boot}.{count}'
+
+    def version(self, user_id):
+        shared = self.shared
+        if shared is None:
+            return self._local_version(user_id)
+        key = self._version_key(user_id)
+        version = shared.get(key)
+        if version is None:
+            shared.add(key, time.time_ns(), self.timeout)
+            version = shared.get(key)
+        return version
+
+    def bump(self, user_id):
+        """Invalidate the cached payload for user_id everywhere"""
+        self.local.pop(user_id)
+        shared = self.shared
+        if shared is None:
+            self._local_version(user_id, bump=True)
+            return
+        try:
+            shared.incr(self._version_key(user_id))
+        except ValueError:
+            shared.set(self._version_key(user_id), time.time_ns(), self.timeout)
+
+    def etag(self, user_id, version=None):
+        if version is None:
+            version = self.version(user_id)
+        return f'"p{user_id}-{version}"'
+
+    def get(self, user_id, version=None):
+        """Return (etag, payload) for the current version, or None"""
+        if version is None:
+            version = self.version(user_id)
+        entry = self.local.get(user_id)
+        if entry is not None and entry[0] == version:
+            hits.inc()
+            return self.etag(user_id, version), entry[1]
+        shared = self.shared
+        if shared is not None:
+            payload = shared.get(f'profile:{user_id}:{version}')
+            if payload is not None:
+                self.local.set(user_id, (version, payload))
+                hits.inc()
+                return self.etag(user_id, version), payload
+        misses.inc()
+        return None
+
+    def set(self, user_id, payload, version=None):
+        """
+        Store payload and return its ETag. Pass the version read before the
+        payload was built so a concurrent bump can't be papered over.
+        """
+        if version is None:
+            version = self.version(user_id)
+        self.local.set(user_id, (version, payload))
+        shared = self.shared
+        if shared is not None:
+            shared.set(f'profile:{user_id}:{version}', payload, self.timeout)
+        return self.etag(user_id, version)
+
+    def stats(self):
+        return {
+            'hits': hits.value,
+            'misses': misses.value,
+            'evictions': evictions.value,
+            'size': len(self.local),
+            'maxsize': self.local.maxsize,
+        }
+
+
+profile_cache = ProfileCache(
+    maxsize=settings.PROFILE_CACHE_SIZE,
+    backend_alias=settings.PROFILE_CACHE_BACKEND,
+    timeout=settings.PROFILE_CACHE_TIMEOUT,
+    local_ttl=settings.PROFILE_CACHE_LOCAL_TTL,
+)
@@ -0,0 +1,117 @@
+"""
+Readiness checks, refreshed in the background.
+
+Orchestrators poll /api/health/ready/ every few seconds on every instance,
+so the endpoint never touches a dependency itself: a PeriodicTask runs the
+checks every READINESS_REFRESH_INTERVAL seconds and the view serves the
+last result. Probe cost is one dict lookup however often it is polled.
+
+The instance is ready when every critical check passes and the result is
+fresh. The outbox check is informational: SMTP trouble is reported, but
+taking API instances out of rotation would not fix it.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .background import PeriodicTask
+
+
+def check_database():
+    started = time.perf_counter()
+    with connections['default'].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return True, {'ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def check_session_store():
+    from importlib import import_module
+
+    engine = settings.SESSION_ENGINE
+    if engine.endswith('signed_cookies'):
+        return True, {'engine': 'signed_cookies'}
+    started = time.perf_counter()
+    # A lookup for a key that never exists exercises the store's read path
+    import_module(engine).SessionStore().exists('readiness-probe')
+    return True, {'engine': engine.rsplit('.', 1)[-1], 'ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def check_outbox():
+    from django.db.models import Count, Min
+    from .models import EmailOutbox
+
+    backlog = EmailOutbox.objects.filter(status=EmailOutbox.STATUS_PENDING).aggregate(
+        pending=Count('id'), oldest=Min('next_attempt_at'),
+    )
+    oldest = backlog['oldest']
+    overdue = max((timezone.now() - oldest).total_seconds(), 0) if oldest else 0
+    ok = (
+        backlog['pending'] <= settings.READINESS_MAX_OUTBOX_BACKLOG
+        and overdue <= settings.READINESS_MAX_OUTBOX_AGE
+    )
+    return ok, {'pending': backlog['pending'], 'oldest_due_seconds': round(overdue)}
+
+
+def check_hashing_pool():
+    from . import hashing
+
+    stats = hashing.get_pool().stats()
+    if not stats['workers']:
+        return True, {'workers': 0}
+    saturation = stats['inflight'] / stats['capacity']
+    return saturation < settings.READINESS_MAX_HASHING_SATURATION, {**stats, 'saturation': round(saturation, 2)}
+
+
+# name: (check, critical)
+CHECKS = {
+    'database': (check_database, True),
+    'session_store': (check_session_store, True),
+    'outbox': (check_outbox, False),
+    'hashing_pool': (check_hashing_pool, True),
+}
+
+
+class ReadinessProbe:
+    def __init__(self, interval):
+        self.interval = interval
+        self.result = None
+        self._lock = threading.Lock()
+        self.task = PeriodicTask('readiness-refresh', interval, self.refresh, run_at_exit=False)
+
+    def refresh(self):
+        checks = {}
+        for name, (check, critical) in CHECKS.items():
+            try:
+                ok, detail = check()
+            except Exception as e:
+                ok, detail = False, {'error': f'{type(e).__name__}: {e}'}
+            checks[name] = {'ok': ok, 'critical': critical, **detail}
+        self.result = {
+            'checked_at': time.time(),
+            'ready': all(c['ok'] for c in checks.values() if c['critical']),
+            'checks': checks,
+        }
+        return self.result
+
+    def get(self):
+        """(ready, payload) from the last refresh; refreshes inline only the first time"""
+        self.task.ensure_started()
+        result = self.result
+        if result is None:
+            with self._lock:
+                result = self.result or self.refresh()
+        age = time.time() - result['checked_at']
+        # A result this old means the refresh thread is stuck
+        ready = result['ready'] and age <= self.interval * 3
+        return ready, {
+            'status': 'ready' if ready else 'not_ready',
+            'age_seconds': round(age, 1),
+            'checks': result['checks'],
+        }
+
+
+probe = ReadinessProbe(settings.READINESS_REFRESH_INTERVAL)
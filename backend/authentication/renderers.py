@@ -0,0 +1,54 @@
+"""
+JSON rendering with orjson, when it is installed.
+
+FastJSONRenderer is a drop-in replacement for DRF's JSONRenderer and
+produces the same bytes. It only hands a payload to orjson when the result
+cannot differ: compact, non-ASCII-escaped output without indentation, and
+no floats anywhere (orjson writes exponents as 1e16 where Python writes
+1e+16). Everything else, and any type orjson rejects, goes through
+JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+# JSONRenderer escapes U+2028/U+2029 so the output is also valid JavaScript
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def _contains_float(data):
+    if isinstance(data, float):
+        return True
+    if isinstance(data, dict):
+        return any(isinstance(key, float) or _contains_float(value) for key, value in data.items())
+    if isinstance(data, (list, tuple)):
+        return any(_contains_float(item) for item in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    _default = staticmethod(encoders.JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.encoder_class is not encoders.JSONEncoder
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            or _contains_float(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._default, option=_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
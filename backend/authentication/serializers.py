@@ -1,8 +1,55 @@
+from django.conf import settings
+from django.db import IntegrityError
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import authenticate
+from . import existence
 from .models import User
 
+
+def _unique_message(field_name):
+    # The message ModelSerializer gives its UniqueValidator
+    field = User._meta.get_field(field_name)
+    return field.error_messages['unique'] % {
+        'model_name': User._meta.verbose_name, 'field_label': field.verbose_name,
+    }
+
+
+class IndexedUniqueValidator(UniqueValidator):
+    """UniqueValidator that skips the query when the existence index says the value is free"""
+
+    def __call__(self, value, serializer_field):
+        field_name = serializer_field.source_attrs[-1]
+        if (
+            existence.enabled
+            and getattr(serializer_field.parent, 'instance', None) is None
+            and not existence.index.might_exist(field_name, value)
+        ):
+            return
+        super().__call__(value, serializer_field)
+
+
+def unique_violations(data):
+    """
+    Errors for the unique fields of data that are taken, shaped like the
+    validators' errors. Used when an INSERT hits the unique constraint on a
+    name the existence index had not seen yet.
+    """
+    values = {'username': data['username'], 'email': User.objects.normalize_email(data['email'])}
+    return {
+        field: [_unique_message(field)]
+        for field, value in values.items()
+        if User.objects.filter(**{field: value}).exists()
+    }
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(max_length=150, validators=[
+        IndexedUniqueValidator(queryset=User.objects.all(), message=_unique_message('username')),
+    ])
+    email = serializers.CharField(max_length=150, validators=[
+        IndexedUniqueValidator(queryset=User.objects.all(), message=_unique_message('email')),
+    ])
     password = serializers.CharField(write_only=True, min_length=6)
     confirm_password = serializers.CharField(write_only=True)
     
@@ -17,8 +64,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('confirm_password')
-        user = User.objects.create_user(**validated_data)
-        return user
+        try:
+            return User.objects.create_user(**validated_data)
+        except IntegrityError:
+            errors = unique_violations(validated_data)
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors)
 
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -46,6 +98,20 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'created_at')
         read_only_fields = ('id', 'created_at')
 
+_created_at_field = serializers.DateTimeField()
+
+def serialize_user(user):
+    """
+    UserSerializer(user).data without building a ModelSerializer per call.
+    Works for User and TokenUser alike (a token's created_at is already a string).
+    """
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'email': user.email,
+        'created_at': _created_at_field.to_representation(user.created_at) if user.created_at else None,
+    }
+
 class ChangePasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField()
     new_password = serializers.CharField(min_length=6)
@@ -55,3 +121,45 @@ class ChangePasswordSerializer(serializers.Serializer):
         if attrs['new_password'] != attrs['confirm_password']:
             raise serializers.ValidationError("New passwords do not match")
         return attrs
+
+class UserListQuerySerializer(serializers.Serializer):
+    """Query parameters of the internal user listing"""
+    EXPORT_FORMATS = ('ndjson', 'csv')
+
+    cursor = serializers.IntegerField(required=False, min_value=0, default=0)
+    limit = serializers.IntegerField(required=False, min_value=1, default=100)
+    email = serializers.CharField(required=False)
+    username = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    export = serializers.ChoiceField(choices=EXPORT_FORMATS, required=False)
+
+    def validate_limit(self, value):
+        return min(value, settings.USER_LIST_MAX_LIMIT)
+
+class UserBatchLookupSerializer(serializers.Serializer):
+    """Body of the internal batch user lookup: ids and/or emails"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    emails = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def validate(self, attrs):
+        size = len(attrs['ids']) + len(attrs['emails'])
+        if not size:
+            raise serializers.ValidationError('Provide ids or emails')
+        if size > settings.USER_BATCH_LOOKUP_MAX:
+            raise serializers.ValidationError(f'At most {settings.USER_BATCH_LOOKUP_MAX} ids and emails per request')
+        return attrs
+
+class CredentialSerializer(serializers.Serializer):
+    # Same field handling as UserLoginSerializer, so both agree on every password
+    email = serializers.CharField()
+    password = serializers.CharField()
+
+class CredentialBatchSerializer(serializers.Serializer):
+    """Body of the internal batch credential check"""
+    credentials = serializers.ListField(child=CredentialSerializer(), allow_empty=False)
+
+    def validate_credentials(self, value):
+        if len(value) > settings.USER_BATCH_VERIFY_MAX:
+            raise serializers.ValidationError(f'At most {settings.USER_BATCH_VERIFY_MAX} credentials per request')
+        return value
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import existence
+from .models import User
+from .profile_cache import profile_cache
+
+
+@receiver(post_save, sender=User)
+def index_user_on_save(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or update_fields is None or {'username', 'email'} & set(update_fields):
+        existence.index.add(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_on_save(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is not part of the profile payload
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    profile_cache.bump(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_profile_on_delete(sender, instance, **kwargs):
+    profile_cache.bump(instance.pk)
@@ -0,0 +1,114 @@
+"""
+Removes expired sessions, dead password reset tokens and auth events older
+than AUTH_EVENTS['RETENTION_DAYS'].
+
+Rows are deleted in small batches walked in primary-key order, with an
+optional pause between batches, so each DELETE touches a bounded key range
+and never holds row or gap locks on MySQL for long. Used by the
+sweep_expired management command, and by an in-process PeriodicTask when
+SWEEP_INTERVAL is set (started on the first request a process serves).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.utils import timezone
+
+from . import metrics
+from .background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+deleted_rows = metrics.counter('auth_sweeper_deleted_total', 'Rows removed by the sweeper', labelnames=('target',))
+
+DB_SESSION_ENGINES = ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db')
+
+
+def delete_in_batches(queryset, batch_size, pause=0.0, key='pk'):
+    """
+    Delete every row of queryset, batch_size rows at a time in `key` order.
+    Returns the number of rows deleted.
+    """
+    deleted = 0
+    last = None
+    while True:
+        batch = queryset.order_by(key)
+        if last is not None:
+            batch = batch.filter(**{f'{key}__gt': last})
+        keys = list(batch.values_list(key, flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        # Re-apply the filter so rows changed since the SELECT are left alone
+        deleted += queryset.filter(**{f'{key}__in': keys}).delete()[0]
+        if len(keys) < batch_size:
+            return deleted
+        last = keys[-1]
+        if pause:
+            time.sleep(pause)
+
+
+def sweep_sessions(batch_size, pause=0.0):
+    from django.contrib.sessions.models import Session
+
+    expired = Session.objects.filter(expire_date__lt=timezone.now())
+    return delete_in_batches(expired, batch_size, pause, key='session_key')
+
+
+def sweep_reset_tokens(batch_size, pause=0.0):
+    from .models import PasswordResetToken
+
+    return PasswordResetToken.objects.purge_expired(batch_size, pause)
+
+
+def sweep_auth_events(batch_size, pause=0.0):
+    from datetime import timedelta
+    from .models import AuthEvent
+
+    retention_days = settings.AUTH_EVENTS.get('RETENTION_DAYS', 0)
+    if not retention_days:
+        return 0
+    old = AuthEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=retention_days))
+    return delete_in_batches(old, batch_size, pause)
+
+
+TARGETS = {
+    'sessions': sweep_sessions,
+    'reset_tokens': sweep_reset_tokens,
+    'auth_events': sweep_auth_events,
+}
+
+
+def sweep(targets=None, batch_size=None, pause=None):
+    """
+    Run the given targets (all by default). Returns {target: (rows, seconds)}.
+    Sessions are skipped unless they are stored in the database.
+    """
+    batch_size = batch_size or settings.SWEEP_BATCH_SIZE
+    pause = settings.SWEEP_PAUSE if pause is None else pause
+    results = {}
+    for target in targets or TARGETS:
+        if target == 'sessions' and settings.SESSION_ENGINE not in DB_SESSION_ENGINES:
+            continue
+        started = time.perf_counter()
+        rows = TARGETS[target](batch_size, pause)
+        results[target] = (rows, time.perf_counter() - started)
+        deleted_rows.labels(target).inc(rows)
+    return results
+
+
+def _periodic_sweep():
+    for target, (rows, seconds) in sweep().items():
+        if rows:
+            logger.info('Swept %d %s in %.2fs', rows, target, seconds)
+
+
+task = PeriodicTask('expired-sweeper', settings.SWEEP_INTERVAL, _periodic_sweep, run_at_exit=False)
+
+
+def _start_on_request(sender, **kwargs):
+    task.ensure_started()
+
+
+if settings.SWEEP_INTERVAL:
+    request_started.connect(_start_on_request, dispatch_uid='start_expired_sweeper')
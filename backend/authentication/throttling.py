@@ -0,0 +1,318 @@
+"""
+Login throttling that runs before any password hashing.
+
+LoginThrottleMiddleware sits near the top of MIDDLEWARE and rejects login
+attempts with 429 when a sliding-window rate is exceeded for the client IP,
+the target account or the service as a whole, or while the account is
+locked out for that client after repeated failures. Lockouts are keyed on
+(email, client IP), so failures from one address cannot lock the owner
+out from another. A rejection costs a few dictionary lookups instead of
+a KDF run.
+
+State lives in a bounded in-process store by default. Set
+LOGIN_THROTTLE['BACKEND'] to a cache alias to share it between processes.
+The internal credential batch endpoint goes through the same throttle
+(get_throttle()), so it is subject to the same account lockouts for the
+calling service's address.
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, RequestDataTooBig
+from django.http import JsonResponse
+from django.http.multipartparser import MultiPartParserError
+
+from . import events, metrics
+from .models import AuthEvent
+
+rejections = metrics.counter('auth_login_throttled_total', 'Login attempts rejected by the throttle')
+
+# Far more than an email and a password need, in any encoding
+MAX_LOGIN_BODY = 4096
+
+_PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600}
+
+
+def parse_rate(rate):
+    """'20/min' -> (20, 60); None or '' disables the limit"""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), _PERIODS[period]
+
+
+class LocalStore:
+    """Expiring counters in a bounded LRU dict, private to this process"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+
+    def incr(self, key, timeout):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._live(key, now)
+            value = 1 if entry is None else entry[0] + 1
+            expires = now + timeout if entry is None else entry[1]
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class CacheStore:
+    """The same interface on top of a shared Django cache"""
+
+    def __init__(self, alias):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, math.ceil(timeout))
+
+    def incr(self, key, timeout):
+        if self.cache.add(key, 1, math.ceil(timeout)):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.set(key, 1, math.ceil(timeout))
+            return 1
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class LoginThrottle:
+    def __init__(self, config, store):
+        self.store = store
+        self.limits = [
+            (scope, parse_rate(config.get(f'{scope.upper()}_RATE')))
+            for scope in ('ip', 'email', 'global')
+        ]
+        self.lockout_threshold = config.get('LOCKOUT_THRESHOLD', 5)
+        self.lockout_base = config.get('LOCKOUT_BASE', 60)
+        self.lockout_max = config.get('LOCKOUT_MAX', 3600)
+        self.failure_window = config.get('FAILURE_WINDOW', 3600)
+
+    def _sliding_window(self, key, limit, period):
+        """
+        Approximate sliding window from two fixed windows: the current count
+        plus the previous window's count weighted by how much of it still
+        overlaps. Returns seconds to wait, or 0 if the attempt is allowed.
+        """
+        now = time.time()
+        window = int(now // period)
+        elapsed = now - window * period
+        current = self.store.incr(f'{key}:{window}', period * 2)
+        previous = self.store.get(f'{key}:{window - 1}') or 0
+        estimated = current + previous * (period - elapsed) / period
+        if estimated <= limit:
+            return 0
+        return max(1, math.ceil(period - elapsed))
+
+    def check(self, ip, email, scopes=None):
+        """
+        Seconds the caller must wait before trying again, 0 if allowed.
+        scopes limits the rate checks to some of 'ip', 'email' and 'global'.
+        """
+        if email:
+            locked_until = self.store.get(f'lock:{email}:{ip or ""}')
+            if locked_until and locked_until > time.time():
+                return math.ceil(locked_until - time.time())
+        for scope, limit in self.limits:
+            if limit is None or (scopes is not None and scope not in scopes):
+                continue
+            identity = {'ip': ip, 'email': email, 'global': '*'}[scope]
+            if not identity:
+                continue
+            wait = self._sliding_window(f'rate:{scope}:{identity}', *limit)
+            if wait:
+                return wait
+        return 0
+
+    def record_failure(self, email, ip):
+        """Count a failed login; lock the account out for ip with exponential backoff"""
+        if not email or not self.lockout_threshold:
+            return
+        key = f'{email}:{ip or ""}'
+        failures = self.store.incr(f'fail:{key}', self.failure_window)
+        if failures >= self.lockout_threshold:
+            duration = min(self.lockout_base * 2 ** (failures - self.lockout_threshold), self.lockout_max)
+            self.store.set(f'lock:{key}', time.time() + duration, duration)
+
+    def record_success(self, email, ip):
+        if email:
+            self.store.delete(f'fail:{email}:{ip or ""}')
+
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+def get_throttle():
+    """The process-wide LoginThrottle, or None when LOGIN_THROTTLE is disabled"""
+    global _throttle
+    config = settings.LOGIN_THROTTLE
+    if not config.get('ENABLED', True):
+        return None
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                backend = config.get('BACKEND')
+                store = CacheStore(backend) if backend else LocalStore(config.get('MAX_KEYS', 100000))
+                _throttle = LoginThrottle(config, store)
+    return _throttle
+
+
+def client_ip(request, header):
+    if header:
+        forwarded = request.META.get(header)
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _json_error(detail, status):
+    return JsonResponse({'detail': detail}, status=status, json_dumps_params={'separators': (',', ':')})
+
+
+def _login_email(request):
+    """
+    (email, None) for the account a login body names, or (None, response)
+    when the body is refused outright. Both JSON and form bodies are read,
+    since the login view accepts either; anything larger than
+    MAX_LOGIN_BODY is turned away before it is parsed.
+    """
+    try:
+        if int(request.META.get('CONTENT_LENGTH') or 0) > MAX_LOGIN_BODY or len(request.body) > MAX_LOGIN_BODY:
+            return None, _json_error('Request body too large.', 413)
+    except ValueError:
+        return None, _json_error('Invalid Content-Length.', 400)
+    except RequestDataTooBig:
+        return None, _json_error('Request body too large.', 413)
+    if not request.body:
+        return None, None
+    if request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        try:
+            email = request.POST.get('email')
+        except MultiPartParserError:
+            return None, None
+    else:
+        # The async views read every body as JSON; DRF rejects other types
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return None, None
+        email = data.get('email') if isinstance(data, dict) else None
+    return (email.strip().lower() if isinstance(email, str) else None), None
+
+
+class LoginThrottleMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.LOGIN_THROTTLE
+        self.throttle = get_throttle()
+        if self.throttle is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.paths = set(config.get('PATHS', ['/api/login/']))
+        self.ip_header = config.get('IP_HEADER')
+        self.shared = bool(config.get('BACKEND'))
+
+    def _rejected(self, wait):
+        rejections.inc()
+        return JsonResponse(
+            {'detail': 'Too many login attempts. Please try again later.'},
+            status=429, headers={'Retry-After': str(wait)},
+            json_dumps_params={'separators': (',', ':')},
+        )
+
+    def _record(self, email, ip, response):
+        if response.status_code == 400:
+            self.throttle.record_failure(email, ip)
+        elif response.status_code == 200:
+            self.throttle.record_success(email, ip)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if request.method != 'POST' or request.path_info not in self.paths:
+            return self.get_response(request)
+
+        email, refused = _login_email(request)
+        if refused is not None:
+            return refused
+        ip = client_ip(request, self.ip_header)
+        wait = self.throttle.check(ip, email)
+        if wait:
+            events.record(AuthEvent.LOGIN_THROTTLED, request, email=email or '')
+            return self._rejected(wait)
+
+        response = self.get_response(request)
+        self._record(email, ip, response)
+        return response
+
+    async def _store_call(self, fn, *args):
+        # A shared cache backend does network I/O; the local store does not
+        if not self.shared:
+            return fn(*args)
+        return await sync_to_async(fn)(*args)
+
+    async def __acall__(self, request):
+        if request.method != 'POST' or request.path_info not in self.paths:
+            return await self.get_response(request)
+
+        email, refused = _login_email(request)
+        if refused is not None:
+            return refused
+        ip = client_ip(request, self.ip_header)
+        wait = await self._store_call(self.throttle.check, ip, email)
+        if wait:
+            await events.arecord(AuthEvent.LOGIN_THROTTLED, request, email=email or '')
+            return self._rejected(wait)
+
+        response = await self.get_response(request)
+        await self._store_call(self._record, email, ip, response)
+        return response
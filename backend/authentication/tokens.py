@@ -0,0 +1,173 @@
+"""
+Stateless signed access and refresh tokens.
+
+A token is ``<payload>.<signature>``: the base64url encoded JSON claims and
+an HMAC-SHA256 over them keyed from SECRET_KEY. Access tokens carry the
+profile fields, so SignedTokenAuthentication validates a request without any
+database access. Refresh tokens are only accepted by the refresh endpoint,
+which loads the user and checks that the password has not changed since the
+token was issued.
+
+Revoked token ids are kept in memory until the token would have expired
+anyway, which keeps the list small. When AUTH_TOKEN_REVOCATION_CACHE names a
+shared cache, revocations are published there so every process sees them.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.fields import DateTimeField
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+_created_at_field = DateTimeField()
+
+
+class TokenError(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _signing_key(secret_key):
+    return hashlib.sha256(f'authentication.tokens:{secret_key}'.encode()).digest()
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(payload):
+    key = _signing_key(settings.SECRET_KEY)
+    return _b64encode(hmac.new(key, payload.encode('ascii'), hashlib.sha256).digest())
+
+
+def password_fingerprint(user):
+    """Short digest of the password hash; changes whenever the password does"""
+    return hashlib.sha256(user.password.encode()).hexdigest()[:16]
+
+
+def encode(claims):
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f'{payload}.{_sign(payload)}'
+
+
+def decode(token, kind):
+    """Verify token and return its claims, raising TokenError if invalid"""
+    # Tokens come straight from request bodies and headers; anything outside
+    # the base64url alphabet can never verify and must not reach encode()
+    if not isinstance(token, str) or not token.isascii():
+        raise TokenError('Malformed token')
+    try:
+        payload, signature = token.split('.')
+    except ValueError:
+        raise TokenError('Malformed token')
+    if not hmac.compare_digest(signature.encode('ascii'), _sign(payload).encode('ascii')):
+        raise TokenError('Invalid token signature')
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise TokenError('Malformed token')
+    if claims.get('typ') != kind:
+        raise TokenError('Wrong token type')
+    if claims.get('exp', 0) <= time.time():
+        raise TokenError('Token has expired')
+    if revocations.is_revoked(claims.get('jti')):
+        raise TokenError('Token has been revoked')
+    return claims
+
+
+def issue(user, kind):
+    now = int(time.time())
+    if kind == ACCESS:
+        lifetime = settings.AUTH_ACCESS_TOKEN_LIFETIME
+        claims = {
+            'username': user.username,
+            'email': user.email,
+            'created_at': _created_at_field.to_representation(user.created_at),
+        }
+    else:
+        lifetime = settings.AUTH_REFRESH_TOKEN_LIFETIME
+        claims = {'pwd': password_fingerprint(user)}
+    claims.update({
+        'typ': kind,
+        'sub': user.pk,
+        'iat': now,
+        'exp': now + lifetime,
+        'jti': secrets.token_hex(8),
+    })
+    return encode(claims)
+
+
+def issue_pair(user):
+    return {
+        'access': issue(user, ACCESS),
+        'refresh': issue(user, REFRESH),
+        'expires_in': settings.AUTH_ACCESS_TOKEN_LIFETIME,
+    }
+
+
+class RevocationList:
+    """Revoked token ids (jti -> expiry), compacted as tokens expire"""
+
+    CACHE_KEY = 'auth:revoked-tokens'
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+
+    def _shared_cache(self):
+        alias = settings.AUTH_TOKEN_REVOCATION_CACHE
+        if not alias:
+            return None
+        from django.core.cache import caches
+        return caches[alias]
+
+    def _compact(self, now):
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    def _sync(self, now):
+        cache = self._shared_cache()
+        if cache is None or now - self._synced_at < settings.AUTH_TOKEN_REVOCATION_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        shared = cache.get(self.CACHE_KEY) or {}
+        with self._lock:
+            self._revoked.update(shared)
+            self._compact(now)
+
+    def revoke(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._compact(now)
+        cache = self._shared_cache()
+        if cache is not None:
+            # Last writer wins; a revocation lost to a race is re-published by
+            # any process that later revokes, and tokens are short lived.
+            shared = cache.get(self.CACHE_KEY) or {}
+            shared = {j: exp for j, exp in shared.items() if exp > now}
+            shared[jti] = expires_at
+            cache.set(self.CACHE_KEY, shared, settings.AUTH_REFRESH_TOKEN_LIFETIME)
+
+    def is_revoked(self, jti):
+        self._sync(time.time())
+        return jti in self._revoked
+
+
+revocations = RevocationList()
+
+
+def revoke(claims):
+    revocations.revoke(claims['jti'], claims['exp'])
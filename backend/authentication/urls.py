@@ -1,14 +1,23 @@
 from django.urls import path
-from . import views
+from . import internal_views, views
 
 urlpatterns = [
     path('register/', views.register, name='register'),
+    path('register/availability/', views.username_availability, name='username_availability'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('token/refresh/', views.token_refresh, name='token_refresh'),
     path('profile/', views.user_profile, name='user_profile'),
     path('change-password/', views.change_password, name='change_password'),
     path('forgot-password/', views.forgot_password, name='forgot_password'),
     path('reset-password/', views.reset_password, name='reset_password'),
     path('health/', views.health_check, name='health_check'),
-    path('debug-users/', views.debug_users, name='debug_users'),
+    path('health/live/', views.liveness, name='liveness'),
+    path('health/ready/', views.readiness, name='readiness'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    # Former unguarded dump of the user table; now the guarded, paginated listing
+    path('debug-users/', internal_views.list_users, name='debug_users'),
+    path('users/', internal_views.list_users, name='list_users'),
+    path('users/lookup/', internal_views.lookup_users, name='lookup_users'),
+    path('users/verify/', internal_views.verify_credentials, name='verify_credentials'),
 ]
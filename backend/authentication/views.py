@@ -1,16 +1,33 @@
+import logging
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth import login, logout
-from django.contrib.auth.hashers import check_password
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
-    UserSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    serialize_user,
 )
-from .models import User
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from .models import AuthEvent, User, PasswordResetToken
+from .authentication import TokenUser
+from .permissions import IsInternalService
+from .profile_cache import profile_cache
+from . import events, existence, hashing, mail, metrics, outbox, tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _db_user(request):
+    """The User row for request.user, loading it if the request used a signed token"""
+    if isinstance(request.user, TokenUser):
+        return request.user.get_user()
+    return request.user
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -18,12 +35,31 @@ def register(request):
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
+        events.record(AuthEvent.REGISTER, request, user)
         return Response({
             'message': 'Registration successful',
-            'user': UserSerializer(user).data
+            'user': serialize_user(user)
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def username_availability(request):
+    """
+    Whether ?username= is free, for the signup form to check as the user
+    types. Most answers come from the existence index without a query.
+    Emails are not offered here so accounts cannot be enumerated by email.
+    """
+    username = request.query_params.get('username', '').strip()
+    if not username or len(username) > 150:
+        return Response({'error': 'username is required (at most 150 characters)'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'username': username,
+        'available': not existence.exists('username', username),
+    }, status=status.HTTP_200_OK)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_view(request):
@@ -31,15 +67,31 @@ def login_view(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         login(request, user)
-        return Response({
+        events.record(AuthEvent.LOGIN, request, user)
+        data = {
             'message': 'Login successful',
-            'user': UserSerializer(user).data
-        }, status=status.HTTP_200_OK)
+            'user': serialize_user(user)
+        }
+        if settings.AUTH_TOKENS_ENABLED:
+            data['tokens'] = tokens.issue_pair(user)
+        return Response(data, status=status.HTTP_200_OK)
+    email = request.data.get('email', '') if isinstance(request.data, dict) else ''
+    events.record(AuthEvent.LOGIN_FAILED, request, email=email)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
+    # Revoke signed tokens presented with the request
+    if isinstance(request.auth, dict):
+        tokens.revoke(request.auth)
+    refresh = request.data.get('refresh')
+    if refresh:
+        try:
+            tokens.revoke(tokens.decode(refresh, tokens.REFRESH))
+        except tokens.TokenError:
+            pass
+    
     # Clear the user's session
     logout(request)
     
@@ -48,28 +100,69 @@ def logout_view(request):
     
     return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_refresh(request):
+    """Exchange a refresh token for a new access/refresh pair"""
+    if not settings.AUTH_TOKENS_ENABLED:
+        return Response({
+            'error': 'Token authentication is disabled'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        claims = tokens.decode(request.data.get('refresh') or '', tokens.REFRESH)
+        user = User.objects.get(pk=claims['sub'])
+    except (tokens.TokenError, User.DoesNotExist):
+        return Response({
+            'error': 'Invalid refresh token'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    # Refresh tokens die with the password they were issued under
+    if claims['pwd'] != tokens.password_fingerprint(user) or not user.is_active:
+        return Response({
+            'error': 'Invalid refresh token'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    # Rotate: each refresh token can be used once
+    tokens.revoke(claims)
+    return Response(tokens.issue_pair(user), status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_profile(request):
-    serializer = UserSerializer(request.user)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # The ETag only depends on the user's cache version, so a matching
+    # If-None-Match is answered without touching the payload at all
+    version = profile_cache.version(request.user.pk)
+    etag = profile_cache.etag(request.user.pk, version)
+    if etag in request.headers.get('If-None-Match', ''):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    cached = profile_cache.get(request.user.pk, version)
+    if cached is not None:
+        etag, data = cached
+    else:
+        data = serialize_user(_db_user(request))
+        etag = profile_cache.set(request.user.pk, data, version)
+    return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
     serializer = ChangePasswordSerializer(data=request.data)
     if serializer.is_valid():
-        user = request.user
+        user = _db_user(request)
         current_password = serializer.validated_data['current_password']
         new_password = serializer.validated_data['new_password']
         
-        if not check_password(current_password, user.password):
+        if not user.check_password(current_password):
+            events.record(AuthEvent.PASSWORD_CHANGE_FAILED, request, user)
             return Response({
                 'error': 'Current password is incorrect'
             }, status=status.HTTP_400_BAD_REQUEST)
         
         user.set_password(new_password)
         user.save()
+        events.record(AuthEvent.PASSWORD_CHANGE, request, user)
         
         return Response({
             'message': 'Password changed successfully'
@@ -80,13 +173,6 @@ def change_password(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def forgot_password(request):
-    from django.core.mail import send_mail
-    from django.conf import settings
-    from django.utils import timezone
-    import secrets
-    import uuid
-    from datetime import timedelta
-    
     email = request.data.get('email')
     if not email:
         return Response({
@@ -96,74 +182,26 @@ def forgot_password(request):
     try:
         user = User.objects.get(email=email)
         
-        # Generate a secure reset token
-        reset_token = str(uuid.uuid4())
-        
-        # Set token expiry to 1 hour from now
-        expiry_time = timezone.now() + timedelta(hours=1)
+        # Generate a secure reset token; only its digest is stored
+        reset_token = PasswordResetToken.objects.issue(user)
+        message = mail.password_reset(
+            user, reset_token, mail.select_locale(request.headers.get('Accept-Language')),
+        )
         
-        # Save token to user
-        user.reset_token = reset_token
-        user.reset_token_expiry = expiry_time
-        user.save()
-        
-        # Create reset URL
-        reset_url = f"http://localhost:3000/reset-password?token={reset_token}"
-        
-        # Email content
-        subject = 'Password Reset Request'
-        message = f"""
-Hello {user.username},
-
-You have requested to reset your password. Please click the link below to reset your password:
+        # Delivery happens in the send_outbox worker, so a slow SMTP relay
+        # never holds this request
+        outbox.enqueue(subject=message.subject, body=message.text, html_body=message.html, recipient=email)
+        events.record(AuthEvent.RESET_REQUEST, request, user)
 
-{reset_url}
+        if settings.DEBUG:
+            logger.debug('Password reset email queued for %s', email)
 
-This link will expire in 1 hour.
-
-If you did not request this password reset, please ignore this email.
+        return Response({
+            'message': f'Password reset email sent to {email}'
+        }, status=status.HTTP_200_OK)
 
-Best regards,
-Your Authentication System Team
-        """
-        
-        try:
-            # Send email with better error handling
-            print(f"DEBUG: Attempting to send email to {email}")
-            print(f"DEBUG: From email: {settings.DEFAULT_FROM_EMAIL}")
-            print(f"DEBUG: SMTP Host: {settings.EMAIL_HOST}:{settings.EMAIL_PORT}")
-            print(f"DEBUG: TLS: {settings.EMAIL_USE_TLS}, SSL: {settings.EMAIL_USE_SSL}")
-            
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=False,
-            )
-            
-            print(f"SUCCESS: Password reset email sent to {email}")
-            return Response({
-                'message': f'Password reset email sent to {email}'
-            }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            print(f"ERROR: Failed to send email: {str(e)}")
-            print(f"ERROR: Email settings - Host: {settings.EMAIL_HOST}, User: {settings.EMAIL_HOST_USER}")
-            
-            # For development, let's temporarily return success even if email fails
-            # so we can test the reset token functionality
-            if settings.DEBUG:
-                print(f"DEBUG MODE: Email failed but returning success. Reset token: {reset_token}")
-                return Response({
-                    'message': f'Password reset email sent to {email} (DEBUG: token={reset_token})'
-                }, status=status.HTTP_200_OK)
-            else:
-                return Response({
-                    'error': 'Failed to send reset email. Please try again later.'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
     except User.DoesNotExist:
+        events.record(AuthEvent.RESET_REQUEST, request, email=email)
         # For security, don't reveal if email exists or not
         return Response({
             'message': f'If an account with email {email} exists, a password reset link has been sent.'
@@ -172,8 +210,6 @@ Your Authentication System Team
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def reset_password(request):
-    from django.utils import timezone
-    
     token = request.data.get('token')
     new_password = request.data.get('new_password')
     
@@ -182,32 +218,44 @@ def reset_password(request):
             'error': 'Token and new password are required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        # Find user with this reset token
-        user = User.objects.get(reset_token=token)
-        
-        # Check if token has expired
-        if user.reset_token_expiry and timezone.now() > user.reset_token_expiry:
+    # Find the token by digest (unique index lookup)
+    reset_token = PasswordResetToken.objects.lookup(token)
+    if reset_token is None or reset_token.used_at is not None:
+        events.record(AuthEvent.RESET_FAILED, request, reset_token.user if reset_token else None)
+        return Response({
+            'error': 'Invalid reset token'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Check if token has expired
+    if reset_token.is_expired:
+        events.record(AuthEvent.RESET_FAILED, request, reset_token.user)
+        return Response({
+            'error': 'Reset token has expired. Please request a new password reset.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Hash before touching the token: if the hashing pool is busy the 503
+    # leaves the link usable for a retry
+    user = reset_token.user
+    encoded = hashing.make_password(new_password)
+    
+    with transaction.atomic():
+        # Tokens are single use; a concurrent request may have consumed it first
+        if not reset_token.consume():
+            events.record(AuthEvent.RESET_FAILED, request, user)
             return Response({
-                'error': 'Reset token has expired. Please request a new password reset.'
+                'error': 'Invalid reset token'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Set new password
-        user.set_password(new_password)
-        
-        # Clear reset token
-        user.reset_token = None
-        user.reset_token_expiry = None
+        user.password = encoded
         user.save()
         
-        return Response({
-            'message': 'Password has been reset successfully'
-        }, status=status.HTTP_200_OK)
-        
-    except User.DoesNotExist:
-        return Response({
-            'error': 'Invalid reset token'
-        }, status=status.HTTP_400_BAD_REQUEST)
+        # Any other outstanding links for this account are now stale
+        user.reset_tokens.filter(used_at__isnull=True).update(used_at=reset_token.used_at)
+    events.record(AuthEvent.RESET_COMPLETE, request, user)
+    
+    return Response({
+        'message': 'Password has been reset successfully'
+    }, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -215,8 +263,25 @@ def health_check(request):
     return Response({'status': 'healthy'}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def liveness(request):
+    """The process is up and serving requests; checks no dependencies"""
+    return Response({'status': 'alive'}, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
-def debug_users(request):
-    """Debug endpoint to list all users - remove in production"""
-    users = User.objects.all().values('id', 'email', 'username')
-    return Response({'users': list(users)}, status=status.HTTP_200_OK)
+def readiness(request):
+    """Cached dependency checks (see readiness.py); 503 until they pass"""
+    from .readiness import probe
+
+    ready, data = probe.get()
+    return Response(data, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([IsInternalService])
+def metrics_view(request):
+    """In-process metrics in the Prometheus text format (requires X-Internal-Token)"""
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,56 @@
+from functools import partial
+
+from .pool import ConnectionPool, PoolTimeout, get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Make a Django DatabaseWrapper take connections from a ConnectionPool.
+
+    Configured through a POOL dict in the database settings:
+
+        'POOL': {
+            'MIN_SIZE': 2, 'MAX_SIZE': 20, 'MAX_LIFETIME': 1800,
+            'TIMEOUT': 10, 'PING_AFTER': 1.0,
+        }
+    """
+
+    def ping_connection(self, connection):
+        raise NotImplementedError
+
+    def reset_connection(self, connection):
+        """Undo per-session state before a connection goes back to the pool"""
+        connection.rollback()
+
+    def _create_pool(self, conn_params):
+        options = self.settings_dict.get('POOL', {})
+        pool = ConnectionPool(
+            factory=partial(super().get_new_connection, conn_params),
+            min_size=options.get('MIN_SIZE', 0),
+            max_size=options.get('MAX_SIZE', 10),
+            max_lifetime=options.get('MAX_LIFETIME', 1800),
+            timeout=options.get('TIMEOUT', 10),
+            ping_after=options.get('PING_AFTER', 1.0),
+            ping=self.ping_connection,
+        )
+        pool.fill()
+        return pool
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, partial(self._create_pool, conn_params))
+        try:
+            return self.pool.acquire()
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection is None:
+            return
+        discard = self.errors_occurred
+        if not discard and (self.in_atomic_block or not self.get_autocommit()):
+            try:
+                with self.wrap_database_errors:
+                    self.reset_connection(self.connection)
+            except Exception:
+                discard = True
+        self.pool.release(self.connection, discard=discard)
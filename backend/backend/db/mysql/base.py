@@ -0,0 +1,7 @@
+"""Django's MySQL backend on PyMySQL, installed as MySQLdb when the backend is first loaded"""
+import pymysql
+
+pymysql.install_as_MySQLdb()
+
+from django.db.backends.mysql.base import *  # noqa: E402,F401,F403
+from django.db.backends.mysql.base import DatabaseWrapper  # noqa: E402,F401
@@ -0,0 +1,178 @@
+"""
+Thread-safe pool of DB-API connections.
+
+Django opens a new database connection for every request when CONN_MAX_AGE
+is 0, which for MySQL means a TCP and authentication handshake each time.
+The pooled database backends in this package hand out connections from a
+ConnectionPool instead, and give them back when Django closes them.
+
+A connection is pinged before reuse if it has been idle longer than
+ping_after seconds, and is closed once it is older than max_lifetime.
+Callers that find the pool exhausted wait up to timeout seconds.
+"""
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ('connection', 'created_at', 'released_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.released_at = time.monotonic()
+
+
+class ConnectionPool:
+    def __init__(self, factory, min_size=0, max_size=10, max_lifetime=1800,
+                 timeout=10, ping_after=1.0, ping=None, close=None):
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._ping = ping or (lambda connection: True)
+        self._close = close or (lambda connection: connection.close())
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self.created = self.reused = self.discarded = 0
+
+    def _expired(self, pooled, now):
+        return self.max_lifetime and now - pooled.created_at >= self.max_lifetime
+
+    def _healthy(self, pooled, now):
+        if now - pooled.released_at < self.ping_after:
+            return True
+        try:
+            return self._ping(pooled.connection)
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        # Called without the lock held; size was already decremented
+        self.discarded += 1
+        try:
+            self._close(pooled.connection)
+        except Exception:
+            pass
+
+    def _create(self):
+        try:
+            pooled = _PooledConnection(self.factory())
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        self.created += 1
+        return pooled
+
+    def fill(self):
+        """Open connections until min_size are available"""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            pooled = self._create()
+            with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f'No database connection available within {self.timeout}s '
+                            f'(pool size {self.max_size})'
+                        )
+                    self._condition.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    pooled = None
+                    self._size += 1
+            if pooled is None:
+                pooled = self._create()
+                break
+            now = time.monotonic()
+            if not self._expired(pooled, now) and self._healthy(pooled, now):
+                self.reused += 1
+                break
+            with self._condition:
+                self._size -= 1
+            self._discard(pooled)
+        with self._condition:
+            self._in_use[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def release(self, connection, discard=False):
+        """Return a connection; discard=True closes it instead of reusing it"""
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+            if pooled is None:
+                return
+            now = time.monotonic()
+            if discard or self._expired(pooled, now):
+                self._size -= 1
+                self._condition.notify()
+            else:
+                pooled.released_at = now
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+        self._discard(pooled)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, create):
+    """Return the pool for a database alias, creating it with create() once"""
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = create()
+    return pool
+
+
+def _reset_after_fork():
+    # Sockets inherited from the parent must not be shared with it
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,11 @@
+"""MySQL backend (PyMySQL) that reuses connections from a pool"""
+from ..mysql import base
+
+from ..base import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def ping_connection(self, connection):
+        connection.ping(reconnect=False)
+        return True
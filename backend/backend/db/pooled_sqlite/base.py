@@ -0,0 +1,11 @@
+"""SQLite backend that reuses connections from a pool, as a local stand-in for MySQL"""
+from django.db.backends.sqlite3 import base
+
+from ..base import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def ping_connection(self, connection):
+        connection.execute('SELECT 1')
+        return True
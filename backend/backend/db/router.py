@@ -0,0 +1,209 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends reads issued while serving a request to one of the
+DATABASE_REPLICAS aliases and everything else to 'default':
+
+- writes, and reads inside a transaction or flagged for update, use the
+  primary;
+- sessions always use the primary, since a session created a moment ago may
+  not have reached a replica yet;
+- once a request writes, its remaining reads use the primary, and
+  ReplicaPinningMiddleware sets a short-lived cookie so the same client's
+  next requests (for DATABASE_REPLICA_PIN_SECONDS) read their own writes;
+- code running outside a request (management commands, background threads)
+  always uses the primary.
+
+Replicas are picked round-robin or by lowest measured replication lag.
+Replicas lagging more than DATABASE_REPLICA_MAX_LAG seconds, or failing the
+lag probe, are skipped until they recover; with none left reads fall back to
+the primary.
+"""
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_pin'
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+class _RequestState:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+def _probe_lag(alias):
+    """Replication lag of a replica in seconds; raises if it is unreachable"""
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'mysql':
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute('SHOW REPLICA STATUS')
+            except Exception:
+                # MySQL < 8.0.22
+                cursor.execute('SHOW SLAVE STATUS')
+            row = cursor.fetchone()
+            if row is None:
+                return 0.0
+            status = dict(zip([column[0] for column in cursor.description], row))
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        # NULL means replication is stopped
+        return float('inf') if lag is None else float(lag)
+    finally:
+        connection.close()
+
+
+class ReplicaSelector:
+    def __init__(self, aliases, strategy, max_lag, check_interval):
+        from authentication.background import PeriodicTask
+
+        self.aliases = list(aliases)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag = {alias: 0.0 for alias in self.aliases}
+        self._cycle = itertools.cycle(self.aliases)
+        self._lock = threading.Lock()
+        self.task = PeriodicTask('replica-lag-probe', check_interval, self.refresh, run_at_exit=False)
+
+    def refresh(self):
+        for alias in self.aliases:
+            try:
+                lag = _probe_lag(alias)
+            except Exception as e:
+                logger.warning('Replica %s is unavailable: %s', alias, e)
+                lag = float('inf')
+            self.lag[alias] = lag
+
+    def healthy(self):
+        return [alias for alias in self.aliases if self.lag[alias] <= self.max_lag]
+
+    def choose(self):
+        self.task.ensure_started()
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        if self.strategy == 'least_lag':
+            return min(healthy, key=self.lag.__getitem__)
+        with self._lock:
+            for _ in range(len(self.aliases)):
+                alias = next(self._cycle)
+                if alias in healthy:
+                    return alias
+        return None
+
+    def stats(self):
+        return {'strategy': self.strategy, 'lag': dict(self.lag), 'healthy': self.healthy()}
+
+
+_selector = None
+_selector_lock = threading.Lock()
+
+
+def get_selector():
+    global _selector
+    if _selector is None:
+        with _selector_lock:
+            if _selector is None:
+                _selector = ReplicaSelector(
+                    settings.DATABASE_REPLICAS,
+                    strategy=settings.DATABASE_REPLICA_SELECTION,
+                    max_lag=settings.DATABASE_REPLICA_MAX_LAG,
+                    check_interval=settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL,
+                )
+    return _selector
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or state.wrote:
+            return 'default'
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return get_selector().choose() or 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaPinningMiddleware:
+    """Keeps clients that just wrote on the primary for DATABASE_REPLICA_PIN_SECONDS"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+
+    def _state_for(self, request):
+        try:
+            pinned = float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        return _RequestState(pinned)
+
+    def _pin(self, state, response):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + self.pin_seconds),
+                max_age=self.pin_seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._pin(state, response)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM calls made in worker
+        # threads still see (and mark) this request's state
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._pin(state, response)
@@ -0,0 +1,122 @@
+"""
+Middleware that only runs for the requests that need it.
+
+PathScopedMiddleware takes the place of several MIDDLEWARE entries and runs
+the chain listed in PATH_SCOPED_MIDDLEWARE['MIDDLEWARE'] only when a
+request is in scope. Stateless API calls (signed tokens, internal tokens,
+health probes) skip it entirely, which is what settings_api.py uses it for:
+session, CSRF and auth middleware run only where a session can exist.
+
+A request is in scope when its path is not under one of SKIP_PATHS, when
+its path is under one of ALWAYS_PATHS (e.g. login and logout, which create
+and destroy sessions), or when it carries one of COOKIES.
+
+The wrapped middleware behaves as it would in MIDDLEWARE: process_view and
+process_exception hooks run for in-scope requests, exceptions are converted
+to responses between layers, and under ASGI the chain runs async (sync-only
+entries are adapted as Django adapts them).
+"""
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+
+def _adapt(handler, handler_is_async, is_async):
+    # As BaseHandler.adapt_method_mode
+    if is_async and not handler_is_async:
+        return sync_to_async(handler, thread_sensitive=True)
+    if handler_is_async and not is_async:
+        return async_to_sync(handler)
+    return handler
+
+
+class PathScopedMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.PATH_SCOPED_MIDDLEWARE
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            self.process_view = self._aprocess_view
+        self.skip_paths = tuple(config.get('SKIP_PATHS', ()))
+        self.always_paths = tuple(config.get('ALWAYS_PATHS', ()))
+        self.cookies = tuple(config.get('COOKIES', (settings.SESSION_COOKIE_NAME,)))
+
+        # Built the way BaseHandler.load_middleware builds MIDDLEWARE, so the
+        # wrapped chain runs in the same mode as the handler around it
+        handler, handler_is_async = get_response, self.is_async
+        self.view_hooks, self.exception_hooks = [], []
+        for path in reversed(config['MIDDLEWARE']):
+            factory = import_string(path)
+            if not handler_is_async and getattr(factory, 'sync_capable', True):
+                middleware_is_async = False
+            else:
+                middleware_is_async = getattr(factory, 'async_capable', False)
+            adapted = _adapt(handler, handler_is_async, middleware_is_async)
+            try:
+                middleware = factory(adapted)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_exception'):
+                self.exception_hooks.append(middleware.process_exception)
+            handler, handler_is_async = convert_exception_to_response(middleware), middleware_is_async
+        if handler is get_response:
+            raise MiddlewareNotUsed
+        self.scoped = _adapt(handler, handler_is_async, self.is_async)
+
+    def in_scope(self, request):
+        path = request.path_info
+        if not path.startswith(self.skip_paths) or path.startswith(self.always_paths):
+            return True
+        return any(name in request.COOKIES for name in self.cookies)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if self.in_scope(request):
+            return self.scoped(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.in_scope(request):
+            return await self.scoped(request)
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.in_scope(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        # Replaces process_view under ASGI: requests out of scope return
+        # without the thread hop Django adds around sync process_view hooks
+        if not self.in_scope(request):
+            return None
+        for hook in self.view_hooks:
+            if not iscoroutinefunction(hook):
+                hook = sync_to_async(hook, thread_sensitive=True)
+            response = await hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        # Django always calls exception middleware synchronously
+        if not self.in_scope(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
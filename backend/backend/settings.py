@@ -1,17 +1,17 @@
+import json
 import os
+import tempfile
 from pathlib import Path
-from dotenv import load_dotenv
-import pymysql
-
-# Configure PyMySQL to work with Django
-pymysql.install_as_MySQLdb()
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Load environment variables from .env file
+# Load environment variables from .env file, when there is one
 env_path = BASE_DIR / '.env'
-load_dotenv(env_path, override=True)
+if env_path.exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(env_path, override=True)
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-your-secret-key-here')
@@ -35,7 +35,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'authentication.instrumentation.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'authentication.throttling.LoginThrottleMiddleware',
+    'backend.db.router.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,11 +67,20 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Route the hot /api/ endpoints to the async views (set by backend/asgi.py)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
 
 # Database
+# DATABASE_POOL=True reuses connections from a per-process pool instead of
+# opening a new MySQL connection for every request (see backend/db/pool.py).
+# Both engines run on PyMySQL, installed as MySQLdb when the backend loads.
+DATABASE_POOL = os.getenv('DATABASE_POOL', 'False').lower() == 'true'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'backend.db.pooled_mysql' if DATABASE_POOL else 'backend.db.mysql',
         'NAME': os.getenv('DATABASE_NAME', 'auth_system_db'),
         'USER': os.getenv('DATABASE_USER', 'root'),
         'PASSWORD': os.getenv('DATABASE_PASSWORD', ''),
@@ -77,9 +89,28 @@ DATABASES = {
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DATABASE_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+            'MAX_LIFETIME': int(os.getenv('DATABASE_POOL_MAX_LIFETIME', 1800)),  # seconds
+            'TIMEOUT': float(os.getenv('DATABASE_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+            'PING_AFTER': float(os.getenv('DATABASE_POOL_PING_AFTER', 1)),  # idle seconds before a liveness ping
+        },
     }
 }
 
+# Read replicas (see backend/db/router.py): comma-separated hosts that share
+# the primary's database name and credentials, exposed as replica1, replica2...
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(filter(None, os.getenv('DATABASE_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_index}'] = {**DATABASES['default'], 'HOST': _host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{_index}')
+DATABASE_REPLICA_SELECTION = os.getenv('DATABASE_REPLICA_SELECTION', 'round_robin')  # or least_lag
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 5))  # read-your-writes window
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DATABASE_REPLICA_MAX_LAG', 10))  # seconds before a replica is skipped
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DATABASE_REPLICA_LAG_CHECK_INTERVAL', 5))  # seconds
+DATABASE_ROUTERS = ['backend.db.router.ReplicaRouter'] if DATABASE_REPLICAS else []
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -96,6 +127,103 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hasher parameters measured on this hardware by `manage.py calibrate_hashers`
+# (see authentication/hashers.py). Without a profile Django's default costs
+# apply. The preferred algorithm comes first; the rest still verify old hashes.
+PASSWORD_HASHER_PROFILE_PATH = os.getenv('PASSWORD_HASHER_PROFILE', str(BASE_DIR / 'hasher_profile.json'))
+PASSWORD_HASHER_PROFILE = {}
+if os.path.exists(PASSWORD_HASHER_PROFILE_PATH):
+    with open(PASSWORD_HASHER_PROFILE_PATH) as _profile_file:
+        PASSWORD_HASHER_PROFILE = json.load(_profile_file)
+
+_PROFILED_HASHERS = {
+    'pbkdf2_sha256': 'authentication.hashers.ProfiledPBKDF2PasswordHasher',
+    'argon2': 'authentication.hashers.ProfiledArgon2PasswordHasher',
+    'scrypt': 'authentication.hashers.ProfiledScryptPasswordHasher',
+}
+_preferred_hasher = PASSWORD_HASHER_PROFILE.get('preferred', 'pbkdf2_sha256')
+PASSWORD_HASHERS = [_PROFILED_HASHERS[_preferred_hasher]] + [
+    path for algorithm, path in _PROFILED_HASHERS.items() if algorithm != _preferred_hasher
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Password hashing pool (see authentication/hashing.py)
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASHING_MAX_QUEUE = int(os.getenv('PASSWORD_HASHING_MAX_QUEUE', 32))
+PASSWORD_HASHING_RETRY_AFTER = int(os.getenv('PASSWORD_HASHING_RETRY_AFTER', 1))  # seconds
+
+# Login throttling ahead of password hashing (see authentication/throttling.py).
+# Rates are "<count>/<s|min|hour>"; an empty rate disables that limit.
+LOGIN_THROTTLE = {
+    'ENABLED': os.getenv('LOGIN_THROTTLE_ENABLED', 'True').lower() == 'true',
+    'IP_RATE': os.getenv('LOGIN_THROTTLE_IP_RATE', '30/min'),
+    'EMAIL_RATE': os.getenv('LOGIN_THROTTLE_EMAIL_RATE', '10/min'),
+    'GLOBAL_RATE': os.getenv('LOGIN_THROTTLE_GLOBAL_RATE', '200/s'),
+    'LOCKOUT_THRESHOLD': int(os.getenv('LOGIN_THROTTLE_LOCKOUT_THRESHOLD', 5)),  # failures per email and IP, 0 disables
+    'LOCKOUT_BASE': int(os.getenv('LOGIN_THROTTLE_LOCKOUT_BASE', 60)),  # seconds, doubles per failure
+    'LOCKOUT_MAX': int(os.getenv('LOGIN_THROTTLE_LOCKOUT_MAX', 3600)),  # seconds
+    'FAILURE_WINDOW': int(os.getenv('LOGIN_THROTTLE_FAILURE_WINDOW', 3600)),  # seconds
+    'BACKEND': os.getenv('LOGIN_THROTTLE_BACKEND') or None,  # shared cache alias
+    'IP_HEADER': os.getenv('LOGIN_THROTTLE_IP_HEADER') or None,  # e.g. HTTP_X_FORWARDED_FOR behind a proxy
+    'PATHS': ['/api/login/'],
+}
+
+# Authentication event log (see authentication/events.py). Events are
+# buffered in memory and written in batches to the auth_event table
+# (SINK=database) or to gzip JSONL files in DIR (SINK=file).
+AUTH_EVENTS = {
+    'ENABLED': os.getenv('AUTH_EVENTS_ENABLED', 'True').lower() == 'true',
+    'SINK': os.getenv('AUTH_EVENTS_SINK', 'database'),
+    'DIR': os.getenv('AUTH_EVENTS_DIR', os.path.join(tempfile.gettempdir(), 'auth-events')),
+    'CAPACITY': int(os.getenv('AUTH_EVENTS_CAPACITY', 10000)),  # events buffered per process
+    'OVERFLOW': os.getenv('AUTH_EVENTS_OVERFLOW', 'drop_oldest'),  # or drop_newest, block
+    'BLOCK_TIMEOUT': float(os.getenv('AUTH_EVENTS_BLOCK_TIMEOUT', 0.05)),  # seconds a request waits with block
+    'FLUSH_INTERVAL': float(os.getenv('AUTH_EVENTS_FLUSH_INTERVAL', 2)),  # seconds
+    'FLUSH_SIZE': int(os.getenv('AUTH_EVENTS_FLUSH_SIZE', 1000)),  # buffered events that force a flush
+    'BATCH_SIZE': int(os.getenv('AUTH_EVENTS_BATCH_SIZE', 500)),  # rows per INSERT
+    'RETENTION_DAYS': int(os.getenv('AUTH_EVENTS_RETENTION_DAYS', 90)),  # swept by sweep_expired, 0 keeps all
+    'IP_HEADER': LOGIN_THROTTLE['IP_HEADER'],
+}
+
+# Per-request metrics and sampled profiles (see authentication/instrumentation.py)
+REQUEST_METRICS = {
+    'ENABLED': os.getenv('REQUEST_METRICS_ENABLED', 'True').lower() == 'true',
+    'PROFILE_SAMPLE_RATE': float(os.getenv('REQUEST_PROFILE_SAMPLE_RATE', 0)),  # fraction run under cProfile
+    'PROFILE_KEEP': int(os.getenv('REQUEST_PROFILE_KEEP', 20)),  # slowest sampled profiles kept
+    'PROFILE_DIR': os.getenv('REQUEST_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'auth-profiles')),
+}
+
+# Buffered last_login writes (see authentication/last_login.py)
+LAST_LOGIN_BATCHING = os.getenv('LAST_LOGIN_BATCHING', 'True').lower() == 'true'
+LAST_LOGIN_FLUSH_INTERVAL = float(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', 5))  # seconds
+LAST_LOGIN_FLUSH_SIZE = int(os.getenv('LAST_LOGIN_FLUSH_SIZE', 500))  # pending users that force a flush
+
+# Sessions: "db" (default), "cached_db", "cache" or "signed_cookies". The
+# cache engines need CACHE_BACKEND to point at a cache shared by all workers;
+# signed_cookies keeps sessions client side, so logins write nothing.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv('SESSION_BACKEND', 'db')
+
+# Expired session / reset token / old auth event sweeping (see authentication/sweeper.py and
+# the sweep_expired command). SWEEP_INTERVAL > 0 also sweeps in-process.
+SWEEP_INTERVAL = float(os.getenv('SWEEP_INTERVAL', 0))  # seconds, 0 disables
+SWEEP_BATCH_SIZE = int(os.getenv('SWEEP_BATCH_SIZE', 500))
+SWEEP_PAUSE = float(os.getenv('SWEEP_PAUSE', 0.05))  # seconds between batches
+
+# Readiness probe (see authentication/readiness.py)
+READINESS_REFRESH_INTERVAL = float(os.getenv('READINESS_REFRESH_INTERVAL', 5))  # seconds between checks
+READINESS_MAX_OUTBOX_BACKLOG = int(os.getenv('READINESS_MAX_OUTBOX_BACKLOG', 1000))  # pending emails
+READINESS_MAX_OUTBOX_AGE = int(os.getenv('READINESS_MAX_OUTBOX_AGE', 600))  # seconds overdue
+READINESS_MAX_HASHING_SATURATION = float(os.getenv('READINESS_MAX_HASHING_SATURATION', 0.9))  # inflight / capacity
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -108,14 +236,56 @@ STATIC_URL = 'static/'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Signed access/refresh tokens issued by /api/login/ (see authentication/tokens.py)
+AUTH_TOKENS_ENABLED = os.getenv('AUTH_TOKENS_ENABLED', 'False').lower() == 'true'
+AUTH_ACCESS_TOKEN_LIFETIME = int(os.getenv('AUTH_ACCESS_TOKEN_LIFETIME', 300))  # seconds
+AUTH_REFRESH_TOKEN_LIFETIME = int(os.getenv('AUTH_REFRESH_TOKEN_LIFETIME', 86400))  # seconds
+AUTH_TOKEN_REVOCATION_CACHE = os.getenv('AUTH_TOKEN_REVOCATION_CACHE') or None  # shared cache alias
+AUTH_TOKEN_REVOCATION_SYNC_INTERVAL = float(os.getenv('AUTH_TOKEN_REVOCATION_SYNC_INTERVAL', 5))
+
+# Serialized /api/profile/ payloads (see authentication/profile_cache.py)
+PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 10000))
+PROFILE_CACHE_BACKEND = os.getenv('PROFILE_CACHE_BACKEND') or None  # shared cache alias
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', 3600))  # seconds
+# Without a shared backend, how long a process trusts its own profile versions
+PROFILE_CACHE_LOCAL_TTL = float(os.getenv('PROFILE_CACHE_LOCAL_TTL', 5))  # seconds
+
+# Shared secret for internal service endpoints (X-Internal-Token header)
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+# Internal user listing (/api/users/)
+USER_LIST_MAX_LIMIT = int(os.getenv('USER_LIST_MAX_LIMIT', 1000))
+USER_EXPORT_CHUNK_SIZE = int(os.getenv('USER_EXPORT_CHUNK_SIZE', 2000))
+
+# Per-process Bloom filters of usernames and emails (see authentication/existence.py),
+# answering "definitely free" at registration and in /api/register/availability/
+EXISTENCE_INDEX = {
+    'ENABLED': os.getenv('EXISTENCE_INDEX_ENABLED', 'True').lower() == 'true',
+    'CAPACITY': int(os.getenv('EXISTENCE_INDEX_CAPACITY', 1000000)),  # users per filter before a rebuild
+    'ERROR_RATE': float(os.getenv('EXISTENCE_INDEX_ERROR_RATE', 0.001)),  # false positives, each costs a query
+    'REFRESH_INTERVAL': float(os.getenv('EXISTENCE_INDEX_REFRESH_INTERVAL', 30)),  # seconds
+    'BATCH_SIZE': int(os.getenv('EXISTENCE_INDEX_BATCH_SIZE', 10000)),  # rows per scan query
+}
+
+# Internal batch endpoints (/api/users/lookup/ and /api/users/verify/). A
+# verify batch is admitted to the hashing pool as a whole, so keep
+# USER_BATCH_VERIFY_MAX within PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_MAX_QUEUE.
+USER_BATCH_LOOKUP_MAX = int(os.getenv('USER_BATCH_LOOKUP_MAX', 500))
+USER_BATCH_VERIFY_MAX = int(os.getenv('USER_BATCH_VERIFY_MAX', 32))
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-    ],
+    ] + (['authentication.authentication.SignedTokenAuthentication'] if AUTH_TOKENS_ENABLED else []),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Same bytes as JSONRenderer; uses orjson when it is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'authentication.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # CORS settings
@@ -133,5 +303,20 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 EMAIL_TIMEOUT = 30
 
+PASSWORD_RESET_TOKEN_LIFETIME = int(os.getenv('PASSWORD_RESET_TOKEN_LIFETIME', 3600))  # seconds
+
+# Email rendering (see authentication/mail.py): links in emails point at the
+# frontend, and templates exist per locale in authentication/templates/authentication/email/
+FRONTEND_BASE_URL = os.getenv('FRONTEND_BASE_URL', 'http://localhost:3000')
+MAIL_DEFAULT_LOCALE = os.getenv('MAIL_DEFAULT_LOCALE', 'en')
+
+# Email outbox (delivered by `python manage.py send_outbox`)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_BACKOFF = int(os.getenv('EMAIL_OUTBOX_RETRY_BACKOFF', 30))  # seconds, doubled per attempt
+EMAIL_OUTBOX_MAX_BACKOFF = int(os.getenv('EMAIL_OUTBOX_MAX_BACKOFF', 3600))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 2))
+
 # Custom user model
 AUTH_USER_MODEL = 'authentication.User'
@@ -0,0 +1,59 @@
+"""
+API-only settings profile.
+
+The full settings serve the admin as well as the API, so every /api/ request
+goes through messages, clickjacking, CSRF, session and auth middleware and
+every worker loads admin, messages, staticfiles and the template engine.
+This profile keeps only what the JSON API uses:
+
+- no admin, messages or staticfiles apps and no template engine (the
+  browsable API renderer goes too, responses are JSON only);
+- session, CSRF and auth middleware run through PathScopedMiddleware (see
+  backend/middleware.py), so they only run for requests that carry a
+  session cookie or open/close a session (login and logout). Requests
+  authenticated with signed or internal tokens skip them. It works under
+  WSGI and ASGI (backend/asgi.py) alike.
+
+Everything else (database, hashing, throttling, metrics) comes from
+backend/settings.py unchanged. Select it with
+
+    DJANGO_SETTINGS_MODULE=backend.settings_api
+
+and keep serving the admin from a worker on the full settings if needed.
+`python -m benchmarks.settings_profiles` compares the two.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS
+    if app not in ('django.contrib.admin', 'django.contrib.messages', 'django.contrib.staticfiles')
+]
+
+_SESSION_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+_UNUSED_MIDDLEWARE = [
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+MIDDLEWARE = [
+    path for path in MIDDLEWARE if path not in _SESSION_MIDDLEWARE + _UNUSED_MIDDLEWARE
+] + ['backend.middleware.PathScopedMiddleware']
+
+PATH_SCOPED_MIDDLEWARE = {
+    'MIDDLEWARE': _SESSION_MIDDLEWARE,
+    'SKIP_PATHS': ['/api/'],
+    # login creates the session (and rotates the CSRF cookie), logout flushes it
+    'ALWAYS_PATHS': ['/api/login/', '/api/logout/'],
+    # and any request carrying SESSION_COOKIE_NAME (the default COOKIES)
+}
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['authentication.renderers.FastJSONRenderer'],
+}
@@ -1,7 +1,16 @@
-from django.contrib import admin
+from django.apps import apps
+from django.conf import settings
 from django.urls import path, include
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/', include('authentication.urls')),
-]
+urlpatterns = []
+
+# Not installed in the API-only profile (backend/settings_api.py)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.ASYNC_VIEWS:
+    urlpatterns.append(path('api/', include('authentication.async_urls')))
+
+urlpatterns.append(path('api/', include('authentication.urls')))
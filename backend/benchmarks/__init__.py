@@ -0,0 +1,44 @@
+"""
+Benchmarks for the authentication backend.
+
+Scripts in this package run against a throwaway SQLite database (see
+benchmarks/settings.py) so they can be executed without MySQL or a real SMTP
+relay. Run them from the backend directory, e.g.:
+
+    python -m benchmarks.outbox_throughput
+"""
+import os
+import sys
+
+
+def setup(settings_module='benchmarks.settings'):
+    """Configure Django for a benchmark run and create the schema"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def snapshot_replicas():
+    """Copy the primary SQLite database into every replica, like a replication catch-up"""
+    import sqlite3
+    from django.conf import settings
+    from django.db import connections
+
+    primary = sqlite3.connect(settings.DATABASES['default']['NAME'])
+    try:
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            replica = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+            try:
+                primary.backup(replica)
+            finally:
+                replica.close()
+    finally:
+        primary.close()
@@ -0,0 +1,263 @@
+"""
+Load and latency benchmark for the /api/ authentication endpoints.
+
+Drives register, login, profile, change-password, forgot-password and
+reset-password in-process through Django's test client, at each requested
+concurrency level (one thread and one client per simulated user), against
+the throwaway SQLite database from benchmarks/settings.py. Users, sessions
+and reset tokens are prepared outside the timed sections.
+
+For every scenario and level it reports throughput, p50/p95/p99 latency,
+database queries per request and password hashing time (from the hashing
+pool's metrics). --output writes the same numbers as JSON, and --compare
+prints the change against an earlier JSON run, e.g. from another commit:
+
+    python -m benchmarks.auth_endpoints --requests 200 --concurrency 1 8 --output before.json
+    git checkout my-branch
+    python -m benchmarks.auth_endpoints --requests 200 --concurrency 1 8 --compare before.json
+
+The login throttle is disabled for the run unless LOGIN_THROTTLE_ENABLED is
+set. forgot-password only queues mail in the outbox, so no email backend is
+involved on the request path.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks import setup
+
+SCENARIOS = ('register', 'login', 'profile', 'change-password', 'forgot-password', 'reset-password')
+
+PASSWORDS = ('bench-password-a', 'bench-password-b')
+
+
+class Worker:
+    """One simulated user issuing the requests of a single scenario"""
+
+    def __init__(self, scenario, run_id, index, ops):
+        from django.test import Client
+        from authentication.models import User
+
+        self.scenario = scenario
+        self.client = Client()
+        self.prefix = f'{run_id}-{scenario}-{index}'
+        self.latencies = []
+        self.errors = {}
+        self.queries = 0
+        self.ops = ops
+
+        if scenario != 'register':
+            self.user = User.objects.create_user(f'{self.prefix}@example.com', self.prefix, PASSWORDS[0])
+        if scenario in ('profile', 'change-password'):
+            self.client.force_login(self.user)
+
+    def request(self, i):
+        post = self.client.post
+        if self.scenario == 'register':
+            email = f'{self.prefix}-{i}@example.com'
+            return post('/api/register/', {
+                'email': email, 'username': f'{self.prefix}-{i}',
+                'password': PASSWORDS[0], 'confirm_password': PASSWORDS[0],
+            }, content_type='application/json'), 201
+        if self.scenario == 'login':
+            return post('/api/login/', {
+                'email': self.user.email, 'password': PASSWORDS[0],
+            }, content_type='application/json'), 200
+        if self.scenario == 'profile':
+            return self.client.get('/api/profile/'), 200
+        if self.scenario == 'change-password':
+            current, new = PASSWORDS[i % 2], PASSWORDS[(i + 1) % 2]
+            return post('/api/change-password/', {
+                'current_password': current, 'new_password': new, 'confirm_password': new,
+            }, content_type='application/json'), 200
+        if self.scenario == 'forgot-password':
+            return post('/api/forgot-password/', {'email': self.user.email}, content_type='application/json'), 200
+        return post('/api/reset-password/', {
+            'token': self.reset_token, 'new_password': PASSWORDS[i % 2],
+        }, content_type='application/json'), 200
+
+    def before(self):
+        # A successful reset invalidates the user's other tokens, so issue
+        # each one just before it is used, outside the timed section
+        if self.scenario == 'reset-password':
+            from authentication.models import PasswordResetToken
+            self.reset_token = PasswordResetToken.objects.issue(self.user)
+
+    def after(self):
+        # Changing the password rotates the session auth hash; log back in
+        # outside the timed section
+        if self.scenario == 'change-password':
+            self.user.refresh_from_db(fields=['password'])
+            self.client.force_login(self.user)
+
+    def run(self, barrier):
+        from django.db import connection
+
+        def count_queries(execute, sql, params, many, context):
+            self.queries += 1
+            return execute(sql, params, many, context)
+
+        barrier.wait()
+        try:
+            for i in range(self.ops):
+                self.before()
+                with connection.execute_wrapper(count_queries):
+                    started = time.perf_counter()
+                    response, expected = self.request(i)
+                    elapsed = time.perf_counter() - started
+                if response.status_code == expected:
+                    self.latencies.append(elapsed)
+                else:
+                    self.errors[response.status_code] = self.errors.get(response.status_code, 0) + 1
+                self.after()
+        finally:
+            connection.close()
+
+
+def _percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else None
+        return {'p50': value, 'p95': value, 'p99': value, 'mean': value}
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        'p50': cuts[49] * 1000,
+        'p95': cuts[94] * 1000,
+        'p99': cuts[98] * 1000,
+        'mean': statistics.fmean(latencies) * 1000,
+    }
+
+
+def run_scenario(scenario, run_id, concurrency, requests):
+    from django.db import connection
+    from authentication import hashing
+
+    ops = max(1, requests // concurrency)
+    workers = [Worker(scenario, f'{run_id}-c{concurrency}', index, ops) for index in range(concurrency)]
+    connection.close()
+
+    barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=worker.run, args=(barrier,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    hash_before = hashing.hash_time.snapshot()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    hash_after = hashing.hash_time.snapshot()
+
+    latencies = [latency for worker in workers for latency in worker.latencies]
+    errors = {}
+    for worker in workers:
+        for code, count in worker.errors.items():
+            errors[str(code)] = errors.get(str(code), 0) + count
+    total = ops * concurrency
+    hashes = hash_after['count'] - hash_before['count']
+    hash_seconds = hash_after['sum'] - hash_before['sum']
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'latency_ms': _percentiles(latencies),
+        'queries_per_request': sum(worker.queries for worker in workers) / total,
+        'hashes_per_request': hashes / total,
+        'hash_ms_mean': hash_seconds / hashes * 1000 if hashes else 0.0,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(value, width=8, digits=1):
+    return f'{value:>{width}.{digits}f}' if value is not None else f'{"-":>{width}}'
+
+
+def print_results(results):
+    print(f'{"scenario":<16} {"conc":>4} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+          f'{"queries":>7} {"hash ms":>8} {"errors":>6}')
+    for r in results:
+        latency = r['latency_ms']
+        print(f'{r["scenario"]:<16} {r["concurrency"]:>4} {_fmt(r["throughput"])} {_fmt(latency["p50"])} '
+              f'{_fmt(latency["p95"])} {_fmt(latency["p99"])} {_fmt(r["queries_per_request"], 7)} '
+              f'{_fmt(r["hash_ms_mean"])} {sum(r["errors"].values()):>6}')
+
+
+def print_comparison(results, baseline):
+    previous = {(r['scenario'], r['concurrency']): r for r in baseline['results']}
+    print(f'\nchange vs {baseline["meta"].get("commit") or "baseline"} (negative latency is better)')
+    print(f'{"scenario":<16} {"conc":>4} {"req/s":>8} {"p50":>8} {"p99":>8} {"queries":>8}')
+
+    def change(new, old):
+        if not old or new is None:
+            return f'{"-":>8}'
+        return f'{(new - old) / old * 100:>+7.1f}%'
+
+    for r in results:
+        old = previous.get((r['scenario'], r['concurrency']))
+        if old is None:
+            continue
+        print(f'{r["scenario"]:<16} {r["concurrency"]:>4} {change(r["throughput"], old["throughput"])} '
+              f'{change(r["latency_ms"]["p50"], old["latency_ms"]["p50"])} '
+              f'{change(r["latency_ms"]["p99"], old["latency_ms"]["p99"])} '
+              f'{change(r["queries_per_request"], old["queries_per_request"])}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--requests', type=int, default=100, help='Requests per scenario and concurrency level')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOGIN_THROTTLE_ENABLED', 'False')
+    setup()
+
+    from django.conf import settings
+
+    run_id = str(int(time.time()))
+    results = []
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            results.append(run_scenario(scenario, run_id, concurrency, args.requests))
+    print_results(results)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'hashing_workers': settings.PASSWORD_HASHING_WORKERS,
+            'hasher': settings.PASSWORD_HASHERS[0],
+            'requests': args.requests,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Concurrent-connection load test against a running server.
+
+Opens --concurrency simultaneous HTTP connections, each issuing requests
+back to back for --duration seconds, and reports throughput, latency and
+errors per concurrency level. Run it against one process of each
+deployment to compare how many connections a worker can keep busy:
+
+    gunicorn backend.wsgi -w 1 --threads 8 -b 127.0.0.1:8000
+    uvicorn backend.asgi:application --workers 1 --port 8001
+
+    python -m benchmarks.concurrency_load --url http://127.0.0.1:8000/api/login/ \\
+        --json '{"email": "bench@example.com", "password": "bench-password"}' \\
+        --concurrency 10 50 200
+
+The client is plain asyncio so it never becomes the bottleneck itself.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def _request(host, port, raw):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(raw)
+        await writer.drain()
+        status_line = await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value.strip())
+        if length:
+            await reader.readexactly(length)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def _client(host, port, raw, deadline, latencies, errors, timeout):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(_request(host, port, raw), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            errors.append('connection')
+            continue
+        if status >= 500:
+            errors.append(status)
+        else:
+            latencies.append(time.perf_counter() - started)
+
+
+async def run_level(host, port, raw, concurrency, duration, timeout):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        _client(host, port, raw, deadline, latencies, errors, timeout) for _ in range(concurrency)
+    ))
+    return latencies, errors
+
+
+def build_request(url, body):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    method = 'POST' if body is not None else 'GET'
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {parts.netloc}', 'Connection: close']
+    payload = b''
+    if body is not None:
+        payload = body.encode()
+        lines += ['Content-Type: application/json', f'Content-Length: {len(payload)}']
+    return parts.hostname, parts.port or 80, ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000/api/health/')
+    parser.add_argument('--json', default=None, help='POST this JSON body instead of issuing GETs')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    host, port, raw = build_request(args.url, args.json)
+    print(f'{"conns":>6} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"errors":>7}')
+    for concurrency in args.concurrency:
+        latencies, errors = asyncio.run(run_level(host, port, raw, concurrency, args.duration, args.timeout))
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            p50, p99 = cuts[49] * 1000, cuts[98] * 1000
+        else:
+            p50 = p99 = float('nan')
+        print(f'{concurrency:>6} {len(latencies) / args.duration:>9.1f} {p50:>9.1f} {p99:>9.1f} {len(errors):>7}')
+
+
+if __name__ == '__main__':
+    main()
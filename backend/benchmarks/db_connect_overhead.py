@@ -0,0 +1,68 @@
+"""
+Cost of Django's connect/query/close cycle with and without the pool.
+
+Each iteration is what a request does with CONN_MAX_AGE=0: open a
+connection, run one query, close it. Uses a SQLite file by default; pass
+--mysql to use the DATABASE_* settings from the environment instead.
+
+    python -m benchmarks.db_connect_overhead --iterations 2000
+    python -m benchmarks.db_connect_overhead --mysql
+"""
+import argparse
+import time
+
+from benchmarks import setup
+
+ENGINES = {
+    'sqlite': ('django.db.backends.sqlite3', 'backend.db.pooled_sqlite'),
+    'mysql': ('django.db.backends.mysql', 'backend.db.pooled_mysql'),
+}
+
+
+def measure(handler, alias, iterations):
+    connection = handler[alias]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        connection.close()
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--mysql', action='store_true')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.db.utils import ConnectionHandler
+
+    if args.mysql:
+        from backend import settings as project_settings
+        base = dict(project_settings.DATABASES['default'])
+        plain, pooled = ENGINES['mysql']
+    else:
+        base = dict(settings.DATABASES['default'])
+        plain, pooled = ENGINES['sqlite']
+
+    handler = ConnectionHandler({
+        'default': base,
+        'plain': {**base, 'ENGINE': plain},
+        'pooled': {**base, 'ENGINE': pooled, 'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 4}},
+    })
+
+    plain_cost = measure(handler, 'plain', args.iterations)
+    pooled_cost = measure(handler, 'pooled', args.iterations)
+
+    print(f'iterations: {args.iterations}')
+    print(f'no pool:    {plain_cost * 1e6:9.1f} us per connect+query+close')
+    print(f'pooled:     {pooled_cost * 1e6:9.1f} us per connect+query+close')
+    print(f'pool stats: {handler["pooled"].pool.stats()}')
+
+
+if __name__ == '__main__':
+    main()
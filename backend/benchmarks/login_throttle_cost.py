@@ -0,0 +1,68 @@
+"""
+CPU cost of a login attempt rejected by the throttle vs one that reaches the
+password hasher.
+
+Hashing runs inline (PASSWORD_HASHING_WORKERS=0) so process CPU time covers
+the KDF too. Reports CPU milliseconds per attempt for failed logins without
+the throttle, for attempts the throttle rejects with 429, and for the bare
+LoginThrottle.check() call.
+
+    python -m benchmarks.login_throttle_cost --attempts 200
+"""
+import argparse
+import os
+import time
+
+from benchmarks import setup
+
+
+def cpu_per_attempt(client, attempts, expected_status):
+    payload = {'email': 'victim@example.com', 'password': 'wrong-password'}
+    started = time.process_time()
+    for _ in range(attempts):
+        response = client.post('/api/login/', payload, content_type='application/json')
+        assert response.status_code == expected_status, response.content
+    return (time.process_time() - started) / attempts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attempts', type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ['PASSWORD_HASHING_WORKERS'] = '0'
+    setup()
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from authentication.models import User
+    from authentication.throttling import LocalStore, LoginThrottle
+
+    User.objects.create_user('victim@example.com', 'victim', 'correct-password')
+
+    with override_settings(LOGIN_THROTTLE={**settings.LOGIN_THROTTLE, 'ENABLED': False}):
+        unthrottled = cpu_per_attempt(Client(), args.attempts, 400)
+
+    # Lock the account after the first failure, then hammer it
+    config = {**settings.LOGIN_THROTTLE, 'ENABLED': True, 'LOCKOUT_THRESHOLD': 1}
+    with override_settings(LOGIN_THROTTLE=config):
+        client = Client()
+        cpu_per_attempt(client, 1, 400)
+        rejected = cpu_per_attempt(client, args.attempts, 429)
+
+    throttle = LoginThrottle(config, LocalStore(100000))
+    checks = args.attempts * 100
+    started = time.process_time()
+    for i in range(checks):
+        throttle.check(f'10.0.{i % 256}.{i // 256 % 256}', f'user{i}@example.com')
+    check_only = (time.process_time() - started) / checks
+
+    print(f'attempts: {args.attempts}')
+    print(f'failed login, no throttle: {unthrottled * 1000:9.3f} ms CPU/attempt')
+    print(f'rejected by throttle:      {rejected * 1000:9.3f} ms CPU/attempt')
+    print(f'LoginThrottle.check():     {check_only * 1000:9.3f} ms CPU/call')
+    print(f'reduction: {unthrottled / rejected:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Email rendering throughput (authentication/mail.py).
+
+Renders the password reset email --messages times per locale with
+mail.render() and, in one call, with mail.render_many(), and compares with
+the inline f-string forgot_password used to build (text only, English
+only). Reports microseconds per message and messages per second, which is
+the budget for bulk sends such as a forced password rotation.
+
+    python -m benchmarks.mail_render --messages 20000
+"""
+import argparse
+import time
+
+from benchmarks import setup
+
+
+def legacy_reset_email(user, reset_token, lifetime_minutes):
+    # The inline f-string forgot_password used before authentication/mail.py
+    reset_url = f"http://localhost:3000/reset-password?token={reset_token}"
+    subject = 'Password Reset Request'
+    message = f"""
+Hello {user.username},
+
+You have requested to reset your password. Please click the link below to reset your password:
+
+{reset_url}
+
+This link will expire in {lifetime_minutes} minutes.
+
+If you did not request this password reset, please ignore this email.
+
+Best regards,
+Your Authentication System Team
+    """
+    return subject, message
+
+
+def timed(fn, messages):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    return elapsed / messages * 1e6, messages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup()
+
+    import secrets
+    from django.conf import settings
+    from authentication import mail
+    from authentication.models import User
+
+    users = [User(pk=i, username=f'user{i}', email=f'user{i}@example.com') for i in range(args.messages)]
+    tokens = [secrets.token_urlsafe(32) for _ in users]
+    lifetime = settings.PASSWORD_RESET_TOKEN_LIFETIME // 60
+
+    escaped = mail.password_reset(User(username='<b>x</b>'), 'token').html
+    assert '&lt;b&gt;x&lt;/b&gt;' in escaped and '<b>x</b>' not in escaped
+    mail.password_reset(users[0], tokens[0])  # compile outside the timings
+
+    def legacy():
+        for user, token in zip(users, tokens):
+            legacy_reset_email(user, token, lifetime)
+
+    print(f'{"renderer":<34} {"us/message":>11} {"messages/s":>11}')
+    us, rate = timed(legacy, args.messages)
+    print(f'{"inline f-string (text, en)":<34} {us:>11.1f} {rate:>11.0f}')
+
+    for locale in sorted(mail.LOCALES):
+        def single():
+            for user, token in zip(users, tokens):
+                mail.password_reset(user, token, locale)
+
+        def batch():
+            mail.render_many('password_reset', [
+                (mail.password_reset_context(user, token), locale) for user, token in zip(users, tokens)
+            ])
+
+        us, rate = timed(single, args.messages)
+        print(f'{f"render() text+html, {locale}":<34} {us:>11.1f} {rate:>11.0f}')
+        us, rate = timed(batch, args.messages)
+        print(f'{f"render_many() text+html, {locale}":<34} {us:>11.1f} {rate:>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Overhead of the request metrics middleware.
+
+Times /api/health/ and the session-authenticated /api/profile/ with request
+metrics disabled (the middleware removes itself), enabled, and enabled with
+every request profiled, and reports microseconds per request for each mode.
+
+    python -m benchmarks.metrics_overhead --requests 5000
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks import setup
+
+
+def per_request(client, path, requests):
+    client.get(path)  # warm up
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+        assert response.status_code == 200, response.content
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from authentication.models import User
+
+    user = User.objects.create_user('bench@example.com', 'bench', 'bench-password')
+    modes = {
+        'disabled': {'ENABLED': False},
+        'enabled': {'ENABLED': True, 'PROFILE_SAMPLE_RATE': 0},
+        'profiling every request': {
+            'ENABLED': True, 'PROFILE_SAMPLE_RATE': 1.0, 'PROFILE_KEEP': 5,
+            'PROFILE_DIR': tempfile.mkdtemp(),
+        },
+    }
+
+    print(f'{"mode":<24} {"health us":>10} {"profile us":>11}')
+    for mode, overrides in modes.items():
+        with override_settings(REQUEST_METRICS={**settings.REQUEST_METRICS, **overrides}):
+            client = Client()
+            client.force_login(user)
+            health = per_request(client, '/api/health/', args.requests)
+            profile = per_request(client, '/api/profile/', args.requests)
+        print(f'{mode:<24} {health * 1e6:>10.1f} {profile * 1e6:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
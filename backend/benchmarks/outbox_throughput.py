@@ -0,0 +1,66 @@
+"""
+Outbox delivery throughput against a local SMTP stand-in.
+
+Queues N password-reset sized messages and drains them through the real
+SMTP email backend pointed at benchmarks.smtp_sink, reporting messages per
+second. Also reports how long enqueue() takes, which is all that
+forgot_password pays per request now.
+
+    python -m benchmarks.outbox_throughput --messages 2000 --batch-size 50
+"""
+import argparse
+import time
+
+from benchmarks import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.0, help='simulated relay latency per message (seconds)')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.core.mail import get_connection
+    from authentication import outbox
+    from authentication.models import EmailOutbox
+    from benchmarks.smtp_sink import SMTPSink
+
+    sink = SMTPSink(delay=args.delay).start()
+    body = 'Hello,\n\nReset your password: http://localhost:3000/reset-password?token=x\n' * 4
+
+    started = time.perf_counter()
+    for i in range(args.messages):
+        outbox.enqueue('Password Reset Request', body, f'user{i}@example.com')
+    enqueue_elapsed = time.perf_counter() - started
+
+    connection = get_connection(
+        'django.core.mail.backends.smtp.EmailBackend',
+        host='127.0.0.1', port=sink.port, use_tls=False, use_ssl=False,
+        username=None, password=None, timeout=settings.EMAIL_TIMEOUT,
+    )
+
+    started = time.perf_counter()
+    sent = failed = 0
+    while True:
+        batch_sent, batch_failed = outbox.drain(batch_size=args.batch_size, connection=connection)
+        if not batch_sent and not batch_failed:
+            break
+        sent += batch_sent
+        failed += batch_failed
+    drain_elapsed = time.perf_counter() - started
+    sink.stop()
+
+    print(f'messages:        {args.messages}')
+    print(f'batch size:      {args.batch_size}')
+    print(f'enqueue:         {enqueue_elapsed / args.messages * 1000:.3f} ms/message')
+    print(f'delivered:       {sent} (failed {failed}, sink received {sink.received})')
+    print(f'remaining:       {EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).count()}')
+    print(f'throughput:      {sent / drain_elapsed:.1f} messages/s')
+
+
+if __name__ == '__main__':
+    main()
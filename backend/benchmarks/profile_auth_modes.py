@@ -0,0 +1,59 @@
+"""
+/api/profile/ throughput with session authentication vs signed tokens.
+
+Logs one user in, then issues the same profile request repeatedly with the
+session cookie and with the bearer access token, reporting requests/s and
+database queries per request for each mode.
+
+    python -m benchmarks.profile_auth_modes --requests 2000
+"""
+import argparse
+import os
+import time
+
+from benchmarks import setup
+
+
+def run(client, requests, **headers):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get('/api/profile/', **headers)
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, len(queries) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ['AUTH_TOKENS_ENABLED'] = 'True'
+    setup()
+
+    from django.test import Client
+    from authentication.models import User
+
+    User.objects.create_user('bench@example.com', 'bench', 'bench-password')
+
+    session_client = Client()
+    response = session_client.post(
+        '/api/login/', {'email': 'bench@example.com', 'password': 'bench-password'},
+        content_type='application/json',
+    )
+    access = response.json()['tokens']['access']
+
+    session_rps, session_queries = run(session_client, args.requests)
+    token_rps, token_queries = run(Client(), args.requests, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    print(f'requests per mode: {args.requests}')
+    print(f'session: {session_rps:8.1f} req/s  {session_queries:.2f} queries/request')
+    print(f'token:   {token_rps:8.1f} req/s  {token_queries:.2f} queries/request')
+
+
+if __name__ == '__main__':
+    main()
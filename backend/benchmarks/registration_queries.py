@@ -0,0 +1,81 @@
+"""
+Queries saved by the existence index (authentication/existence.py).
+
+Seeds --users accounts, builds the index, then runs --registrations
+registrations through /api/register/ and the same number of username
+availability checks, first with the index disabled (every uniqueness check
+is a SELECT) and then enabled. Reports SELECTs per registration and per
+availability check, the time per check, and the index's build time, size
+and observed false-positive rate.
+
+    python -m benchmarks.registration_queries --users 50000 --registrations 200
+"""
+import argparse
+import time
+
+from benchmarks import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--registrations', type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from authentication import existence
+    from authentication.models import User
+
+    password = make_password('bench-password')
+    User.objects.bulk_create(
+        [User(email=f'seed{i}@example.com', username=f'seed{i}', password=password) for i in range(args.users)],
+        batch_size=5000,
+    )
+
+    started = time.perf_counter()
+    existence.index.refresh()
+    build = time.perf_counter() - started
+    size = sum(len(f.bits) for f in existence.index.filters.values())
+
+    client = Client()
+    print(f'Index over {args.users} users: built in {build * 1000:.0f} ms, '
+          f'{size / 1024:.0f} KiB for both fields\n')
+    print(f'{"index":<9} {"SELECT/registration":>20} {"SELECT/check":>13} {"us/check":>9}')
+    for mode in ('disabled', 'enabled'):
+        existence.enabled = mode == 'enabled'
+        selects = 0
+        for i in range(args.registrations):
+            name = f'{mode}{i}'
+            payload = {'username': name, 'email': f'{name}@example.com',
+                       'password': 'bench-password', 'confirm_password': 'bench-password'}
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post('/api/register/', payload, content_type='application/json')
+            assert response.status_code == 201, response.content
+            selects += sum(q['sql'].startswith('SELECT') for q in queries)
+
+        check_selects = 0
+        started = time.perf_counter()
+        for i in range(args.registrations):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get('/api/register/availability/', {'username': f'free-{mode}-{i}'})
+            assert response.json()['available'], response.content
+            check_selects += len(queries)
+        per_check = (time.perf_counter() - started) / args.registrations
+
+        print(f'{mode:<9} {selects / args.registrations:>20.2f} '
+              f'{check_selects / args.registrations:>13.2f} {per_check * 1e6:>9.1f}')
+
+    false_positives = sum(
+        existence.normalize(f'never-{i}') in existence.index.filters['username'] for i in range(100000)
+    )
+    print(f'\nFalse positives on 100000 unused names: {false_positives} '
+          f'({false_positives / 1000:.3f}%, configured {existence.index.error_rate * 100:.3f}%)')
+
+
+if __name__ == '__main__':
+    main()
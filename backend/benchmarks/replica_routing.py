@@ -0,0 +1,89 @@
+"""
+Read-replica routing on local SQLite databases.
+
+Starts a primary plus --replicas SQLite files standing in for replicas,
+snapshots the primary into them, then:
+
+- logs in and fetches profiles for existing users, reporting how the
+  queries spread over the primary and each replica;
+- registers a new user, which the stale replicas do not have yet, and
+  shows that the same client reads its own write from the primary while a
+  client without the pin cookie is routed to a replica that has no such user.
+
+    python -m benchmarks.replica_routing --replicas 2 --users 20
+"""
+import argparse
+import os
+from collections import Counter
+from contextlib import ExitStack
+
+from benchmarks import setup, snapshot_replicas
+
+
+def count_queries(counts):
+    from django.db import connections
+
+    stack = ExitStack()
+    for alias in connections:
+        def wrapper(execute, sql, params, many, context, alias=alias):
+            counts[alias] += 1
+            return execute(sql, params, many, context)
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+    return stack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replicas', type=int, default=2)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--selection', choices=['round_robin', 'least_lag'], default='round_robin')
+    args = parser.parse_args()
+
+    os.environ['BENCHMARK_REPLICAS'] = str(args.replicas)
+    os.environ.setdefault('PASSWORD_HASHING_WORKERS', '0')
+    os.environ.setdefault('LOGIN_THROTTLE_ENABLED', 'False')
+    os.environ.setdefault('LAST_LOGIN_BATCHING', 'True')
+    setup()
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from authentication.models import User
+
+    password = 'bench-password'
+    users = [User.objects.create_user(f'user{i}@example.com', f'user{i}', password) for i in range(args.users)]
+    snapshot_replicas()
+
+    with override_settings(DATABASE_REPLICA_SELECTION=args.selection):
+        counts = Counter()
+        with count_queries(counts):
+            for user in users:
+                client = Client()
+                response = client.post('/api/login/', {'email': user.email, 'password': password},
+                                       content_type='application/json')
+                assert response.status_code == 200, response.content
+                assert client.get('/api/profile/').status_code == 200
+        print(f'queries by database for {args.users} logins + profile reads:')
+        for alias in ['default'] + settings.DATABASE_REPLICAS:
+            print(f'  {alias:<10} {counts[alias]:>5}')
+
+        client = Client()
+        response = client.post('/api/register/', {
+            'email': 'new@example.com', 'username': 'new',
+            'password': password, 'confirm_password': password,
+        }, content_type='application/json')
+        assert response.status_code == 201, response.content
+        print(f'\nregistered new@example.com; pin cookie set: {"db_pin" in response.cookies}')
+        response = client.post('/api/login/', {'email': 'new@example.com', 'password': password},
+                               content_type='application/json')
+        print(f'login by the same client (pinned to primary): {response.status_code}')
+        response = Client().post('/api/login/', {'email': 'new@example.com', 'password': password},
+                                 content_type='application/json')
+        print(f'login by another client (stale replica):      {response.status_code}')
+        snapshot_replicas()
+        response = Client().post('/api/login/', {'email': 'new@example.com', 'password': password},
+                                 content_type='application/json')
+        print(f'same, after the replicas caught up:           {response.status_code}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Settings for benchmark runs: the project settings on a temporary SQLite database"""
+import os
+import tempfile
+
+from backend.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+_database_dir = tempfile.mkdtemp()
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('BENCHMARK_DATABASE', os.path.join(_database_dir, 'benchmark.sqlite3')),
+    }
+}
+
+# BENCHMARK_REPLICAS=N adds N SQLite files standing in for read replicas;
+# benchmarks.snapshot_replicas() copies the primary into them
+DATABASE_REPLICAS = []
+for _index in range(1, int(os.getenv('BENCHMARK_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{_index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(_database_dir, f'replica{_index}.sqlite3'),
+    }
+    DATABASE_REPLICAS.append(f'replica{_index}')
+DATABASE_ROUTERS = ['backend.db.router.ReplicaRouter'] if DATABASE_REPLICAS else []
+
+# The initial authentication migration does not describe the `user` table
+# the models map onto, so build the benchmark schema from the models.
+MIGRATION_MODULES = {'authentication': None}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+EMAIL_HOST = '127.0.0.1'
+EMAIL_USE_TLS = False
+EMAIL_USE_SSL = False
+EMAIL_HOST_USER = None
+EMAIL_HOST_PASSWORD = None
+DEFAULT_FROM_EMAIL = 'benchmark@example.com'
+
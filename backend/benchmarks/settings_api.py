@@ -0,0 +1,5 @@
+"""Benchmark settings on the API-only profile (backend/settings_api.py)"""
+from benchmarks.settings import *  # noqa: F401,F403
+from backend.settings_api import (  # noqa: F401
+    INSTALLED_APPS, MIDDLEWARE, PATH_SCOPED_MIDDLEWARE, REST_FRAMEWORK, TEMPLATES,
+)
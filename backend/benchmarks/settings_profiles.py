@@ -0,0 +1,140 @@
+"""
+Full settings vs the API-only profile (backend/settings_api.py).
+
+Cold start: each profile is started --starts times in a fresh interpreter,
+timing django.setup(), building the WSGI application and serving the first
+request (/api/health/live/), plus the modules loaded and peak RSS.
+
+Per request: in one process per profile, times a stateless probe, a
+signed-token /api/profile/ and a session /api/profile/, and subtracts the
+same requests with MIDDLEWARE emptied to get the middleware cost alone.
+
+    python -m benchmarks.settings_profiles --starts 5 --requests 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROFILES = {
+    'full': 'benchmarks.settings',
+    'api': 'benchmarks.settings_api',
+}
+
+
+def cold_start():
+    started = time.perf_counter()
+    import django
+
+    django.setup()
+    setup_done = time.perf_counter()
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    response = handler(RequestFactory().get('/api/health/live/').environ, lambda status, headers: None)
+    assert response.status_code == 200, response.content
+    first_request = time.perf_counter()
+
+    import resource
+
+    return {
+        'setup_ms': (setup_done - started) * 1000,
+        'first_request_ms': (first_request - setup_done) * 1000,
+        'modules': len(sys.modules),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def per_request(client, path, requests, **headers):
+    client.get(path, **headers)  # warm up
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, **headers)
+        assert response.status_code == 200, response.content
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def request_costs(settings_module, requests):
+    from benchmarks import setup
+
+    setup(settings_module)
+
+    from django.test import Client, override_settings
+    from authentication import tokens
+    from authentication.models import User
+
+    user = User.objects.create_user('bench@example.com', 'bench', 'bench-password')
+    bearer = {'HTTP_AUTHORIZATION': f'Bearer {tokens.issue(user, tokens.ACCESS)}'}
+
+    def measure():
+        session_client = Client()
+        session_client.force_login(user)
+        return {
+            'probe': per_request(Client(), '/api/health/live/', requests),
+            'token profile': per_request(Client(), '/api/profile/', requests, **bearer),
+            'session profile': per_request(session_client, '/api/profile/', requests),
+        }
+
+    with_middleware = measure()
+    with override_settings(MIDDLEWARE=[]):
+        client = Client()
+        bare = {
+            'probe': per_request(client, '/api/health/live/', requests),
+            'token profile': per_request(client, '/api/profile/', requests, **bearer),
+        }
+    return {
+        kind: {'us': us, 'middleware_us': us - bare[kind] if kind in bare else None}
+        for kind, us in with_middleware.items()
+    }
+
+
+def run_child(mode, settings_module, requests=0):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module, 'AUTH_TOKENS_ENABLED': 'True'}
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.settings_profiles', '--child', mode,
+         '--settings', settings_module, '--requests', str(requests)],
+        env=env, check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--starts', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--child', choices=['cold', 'requests'], help=argparse.SUPPRESS)
+    parser.add_argument('--settings', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'cold':
+        print(json.dumps(cold_start()))
+        return
+    if args.child == 'requests':
+        print(json.dumps(request_costs(args.settings, args.requests)))
+        return
+
+    print(f'Cold start, median of {args.starts} fresh interpreters')
+    print(f'{"profile":<8} {"setup ms":>9} {"first req ms":>13} {"total ms":>9} {"modules":>8} {"rss MB":>7}')
+    for name, settings_module in PROFILES.items():
+        runs = [run_child('cold', settings_module) for _ in range(args.starts)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f'{name:<8} {median["setup_ms"]:>9.1f} {median["first_request_ms"]:>13.1f} '
+              f'{median["setup_ms"] + median["first_request_ms"]:>9.1f} '
+              f'{median["modules"]:>8.0f} {median["max_rss_mb"]:>7.1f}')
+
+    print(f'\nPer request, {args.requests} requests each (middleware = with stack - empty MIDDLEWARE)')
+    print(f'{"profile":<8} {"request":<16} {"us/request":>11} {"middleware us":>14}')
+    for name, settings_module in PROFILES.items():
+        for kind, cost in run_child('requests', settings_module, args.requests).items():
+            middleware = f'{cost["middleware_us"]:>14.1f}' if cost['middleware_us'] is not None else f'{"-":>14}'
+            print(f'{name:<8} {kind:<16} {cost["us"]:>11.1f} {middleware}')
+
+
+if __name__ == '__main__':
+    main()
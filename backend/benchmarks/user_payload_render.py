@@ -0,0 +1,60 @@
+"""
+Per-response cost of building and rendering a user payload.
+
+Compares UserSerializer(user).data + JSONRenderer, which every register,
+login and profile response used to go through, with serialize_user() +
+FastJSONRenderer, checks the bytes are identical (including a non-ASCII
+username and a TokenUser), and reports microseconds per response.
+
+    python -m benchmarks.user_payload_render --iterations 20000
+"""
+import argparse
+import time
+
+from benchmarks import setup
+
+
+def per_call(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+    from authentication import renderers, tokens
+    from authentication.authentication import TokenUser
+    from authentication.models import User
+    from authentication.serializers import UserSerializer, serialize_user
+
+    user = User.objects.create_user('bench@example.com', 'bénch user', 'bench-password')
+    token_user = TokenUser(tokens.decode(tokens.issue(user, tokens.ACCESS), tokens.ACCESS))
+    slow, fast = JSONRenderer(), renderers.FastJSONRenderer()
+
+    for subject in (user, token_user):
+        for wrap in (lambda data: data, lambda data: {'message': 'Login successful', 'user': data}):
+            expected = slow.render(wrap(UserSerializer(subject).data))
+            actual = fast.render(wrap(serialize_user(subject)))
+            assert actual == expected, (actual, expected)
+
+    serializer_only = per_call(lambda: UserSerializer(user).data, args.iterations)
+    fast_serializer_only = per_call(lambda: serialize_user(user), args.iterations)
+    before = per_call(lambda: slow.render({'user': UserSerializer(user).data}), args.iterations)
+    after = per_call(lambda: fast.render({'user': serialize_user(user)}), args.iterations)
+
+    print(f'orjson available: {renderers.orjson is not None}; output identical: yes')
+    print(f'UserSerializer(user).data:              {serializer_only:8.2f} us')
+    print(f'serialize_user(user):                   {fast_serializer_only:8.2f} us')
+    print(f'before (UserSerializer + JSONRenderer): {before:8.2f} us/response')
+    print(f'after (serialize_user + FastJSON):      {after:8.2f} us/response')
+
+
+if __name__ == '__main__':
+    main()